@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from api import (  # noqa: F401
+            authentication,
+            catalog_cache,
+            ingredient_index,
+        )
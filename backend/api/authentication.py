@@ -0,0 +1,170 @@
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from api.generations import SharedGeneration
+from api.metrics import registry
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from foodgram.settings import TOKEN_CACHE_SECONDS, TOKEN_CACHE_SIZE
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+GENERATION_KEY = "auth-token-generation"
+
+
+class TokenCache:
+    """LRU-кэш проверенных токенов в памяти процесса с ограниченным TTL.
+
+    Поколение в общем кэше Django (CACHES) сбрасывает записи всех
+    воркеров, когда пользователь выходит, меняет пароль или
+    блокируется. Воркер держит поколение в памяти и перечитывает его
+    не чаще раза в CACHE_GENERATION_SECONDS, поэтому попадание
+    не делает ни одного запроса. Счетчики пользователя
+    (DENORMALIZED_FIELDS) не кэшируются и читаются из базы
+    при обращении.
+    """
+
+    def __init__(self, max_size, ttl, check_interval=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = SharedGeneration(GENERATION_KEY, check_interval)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = defaultdict(set)
+        self._version = 0
+        self._miss_seconds = 0.0
+        self._misses = 0
+
+    def stamp(self):
+        """Состояние кэша до чтения из базы: запись, прочитанная
+        во время инвалидации, не сохраняется."""
+        return self.generation.get(), self._version
+
+    def get(self, key, stamp):
+        """Возвращает (пользователь, токен) или None."""
+        generation = stamp[0]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] > now and entry[1] == generation:
+                self._entries.move_to_end(key)
+                return entry[2], entry[3]
+            self._discard(key)
+        return None
+
+    def put(self, key, user, token, stamp):
+        generation, version = stamp
+        with self._lock:
+            if version != self._version:
+                return
+            self._discard(key)
+            self._entries[key] = (
+                time.monotonic() + self.ttl, generation, user, token
+            )
+            self._keys_by_user[user.pk].add(key)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[2].pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[2].pk]
+
+    def invalidate_user(self, user_id, keys=()):
+        """Забывает токены пользователя здесь и, через смену
+        поколения, в остальных воркерах."""
+        with self._lock:
+            self._version += 1
+            for key in (*self._keys_by_user.get(user_id, ()), *keys):
+                self._discard(key)
+        self.generation.bump()
+
+    def record(self, source, seconds):
+        registry.inc("foodgram_token_auth_requests_total", source=source)
+        registry.observe(
+            "foodgram_token_auth_duration_seconds", seconds, source=source
+        )
+        with self._lock:
+            if source == "miss":
+                self._miss_seconds += seconds
+                self._misses += 1
+                return
+            if not self._misses:
+                return
+            saved = self._miss_seconds / self._misses - seconds
+        if saved > 0:
+            registry.inc("foodgram_token_auth_saved_seconds_total", saved)
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_SECONDS)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, который не ходит в базу за уже
+    проверенным токеном."""
+
+    def authenticate_credentials(self, key):
+        started = time.perf_counter()
+        stamp = token_cache.stamp()
+        cached = token_cache.get(key, stamp)
+        if cached is None:
+            user, token = self.load_credentials(key)
+            token_cache.put(key, user, token, stamp)
+            source = "miss"
+        else:
+            user, token = cached
+            source = "hit"
+        token_cache.record(source, time.perf_counter() - started)
+        return copy.copy(user), token
+
+    def load_credentials(self, key):
+        """Как в TokenAuthentication, но счетчики пользователя
+        откладываются: их загрузка при обращении одинакова
+        для промаха и попадания и не попадает в кэш."""
+        try:
+            token = (
+                self.get_model().objects.select_related("user")
+                .defer(*(
+                    f"user__{field}" for field in User.DENORMALIZED_FIELDS
+                ))
+                .get(key=key)
+            )
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return token.user, token
+
+
+def invalidate_user(user_id, keys=()):
+    token_cache.invalidate_user(user_id, keys)
+    transaction.on_commit(
+        lambda: token_cache.invalidate_user(user_id, keys)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(instance, **kwargs):
+    invalidate_user(instance.user_id, (instance.key,))
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(instance, created, update_fields=None, **kwargs):
+    if created or update_fields == frozenset(("last_login",)):
+        return
+    invalidate_user(instance.pk)
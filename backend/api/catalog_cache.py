@@ -0,0 +1,140 @@
+import threading
+
+from api.generations import SharedGeneration
+from api.metrics import registry
+from api.renderers import FastJSONRenderer
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from recipes.models import Ingredient, Tag
+
+
+def matches_etag(etag, if_none_match):
+    """Есть ли etag среди ETag заголовка If-None-Match
+    (слабое сравнение, как требует RFC 7232)."""
+    return any(
+        tag == "*" or tag.removeprefix("W/") == etag
+        for tag in parse_etags(if_none_match)
+    )
+
+
+class CatalogCache:
+    """Кэш сериализованного JSON справочника в памяти процесса.
+
+    Версия справочника хранится в общем кэше Django (CACHES)
+    и в памяти воркера (SharedGeneration): попадание и 304 не делают
+    запросов, а после смены версии каждый воркер не позже чем через
+    CACHE_GENERATION_SECONDS пересобирает JSON и отдает тот же ETag.
+    Версия меняется сигналами при сохранении и удалении объектов
+    и служит ETag и Last-Modified.
+    """
+
+    def __init__(self, name, check_interval=None):
+        self.name = name
+        self.generation = SharedGeneration(
+            f"catalog-generation:{name}", check_interval
+        )
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._entry = None
+
+    def bump(self):
+        self.generation.bump()
+
+    def get_generation(self):
+        return self.generation.get()
+
+    def respond(self, request, get_data):
+        """Возвращает 304 или закэшированный JSON справочника.
+        get_data вызывается только при промахе кэша."""
+        generation = self.get_generation()
+        etag = f'"{self.name}-{generation}"'
+        last_modified = generation // 1_000_000_000
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if_modified_since = parse_http_date_safe(
+            request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+        )
+        if (
+            if_none_match is not None
+            and matches_etag(etag, if_none_match)
+            or if_none_match is None
+            and if_modified_since is not None
+            and if_modified_since >= last_modified
+        ):
+            with self._lock:
+                self.not_modified += 1
+            self.record("not_modified")
+            response = HttpResponseNotModified()
+        else:
+            entry = self._entry
+            if entry is not None and entry[0] == generation:
+                with self._lock:
+                    self.hits += 1
+                self.record("hit")
+            else:
+                entry = (generation, FastJSONRenderer().render(get_data()))
+                with self._lock:
+                    self.misses += 1
+                    self._entry = entry
+                self.record("miss")
+            response = HttpResponse(
+                entry[1], content_type="application/json"
+            )
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    def record(self, result):
+        registry.inc(
+            "foodgram_catalog_cache_requests_total",
+            catalog=self.name,
+            result=result,
+        )
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+tags_cache = CatalogCache("tags")
+ingredients_cache = CatalogCache("ingredients")
+
+
+class CatalogCacheMixin:
+    """Отдает список без параметров запроса из CatalogCache."""
+
+    catalog_cache = None
+
+    def get_list_data(self, queryset):
+        """Данные списка для кэша; вьюсет может собрать их
+        без сериализатора."""
+        return self.get_serializer(queryset, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.catalog_cache.respond(
+            request,
+            lambda: self.get_list_data(
+                self.filter_queryset(self.get_queryset())
+            ),
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_cache(**kwargs):
+    tags_cache.bump()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients_cache(**kwargs):
+    ingredients_cache.bump()
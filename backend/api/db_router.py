@@ -0,0 +1,73 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import Error
+from foodgram.settings import REPLICA_DATABASES, REPLICA_HEALTH_INTERVAL
+
+use_replica = ContextVar("use_replica", default=False)
+"""Можно ли читать из реплики в текущем запросе."""
+
+PRIMARY_ONLY_APPS = ("authtoken", "sessions", "django_cache")
+"""Токены, сессии и кэш в базе всегда читаются с основной базы:
+только что выданный токен или новая версия кэша могут еще
+не дойти до реплики."""
+
+
+class ReplicaHealth:
+    """Запоминает на REPLICA_HEALTH_INTERVAL секунд, отвечает ли реплика."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        checked = self._checked.get(alias)
+        if checked is not None and now - checked[0] < self.interval:
+            return checked[1]
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            healthy = True
+        except Error:
+            connections[alias].close()
+            healthy = False
+        with self._lock:
+            self._checked[alias] = (now, healthy)
+        return healthy
+
+
+replica_health = ReplicaHealth(REPLICA_HEALTH_INTERVAL)
+
+
+class PrimaryReplicaRouter:
+    """Читает из реплик, когда ReplicaRoutingMiddleware разрешила это
+    для запроса, и из основной базы во всех остальных случаях."""
+
+    def db_for_read(self, model, **hints):
+        if (
+            not REPLICA_DATABASES
+            or not use_replica.get()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = [
+            alias for alias in REPLICA_DATABASES
+            if replica_health.is_healthy(alias)
+        ]
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,98 @@
+from django.db import connection, transaction
+from django.db.models import Q
+from foodgram.settings import FEED_FANOUT_LIMIT
+from recipes.models import Recipes, Timeline
+from users.models import Subscribe, User
+
+TIMELINE_TABLE = Timeline._meta.db_table
+RECIPES_TABLE = Recipes._meta.db_table
+SUBSCRIBE_TABLE = Subscribe._meta.db_table
+USERS_TABLE = User._meta.db_table
+
+
+def execute(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def fan_out_recipe(recipe):
+    """После коммита добавляет рецепт в ленты подписчиков автора.
+
+    Если подписчиков больше FEED_FANOUT_LIMIT, автор навсегда
+    переводится на чтение при запросе и рецепт не рассылается."""
+    author = recipe.author
+    if not author.feed_fanout:
+        return
+    if author.subscribers_count > FEED_FANOUT_LIMIT:
+        User.objects.filter(pk=author.pk).update(feed_fanout=False)
+        return
+    transaction.on_commit(
+        lambda: execute(
+            f"INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id) "
+            f"SELECT user_id, %s FROM {SUBSCRIBE_TABLE} "
+            f"WHERE author_id = %s "
+            f"ON CONFLICT (user_id, recipe_id) DO NOTHING",
+            (recipe.pk, author.pk),
+        )
+    )
+
+
+def add_author_to_timeline(user_id, author_id):
+    """После коммита подписки добавляет в ленту пользователя все
+    рецепты нового автора, если они рассылаются по лентам."""
+    transaction.on_commit(
+        lambda: execute(
+            f"INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id) "
+            f"SELECT %s, recipes.id FROM {RECIPES_TABLE} recipes "
+            f"JOIN {USERS_TABLE} author ON author.id = recipes.author_id "
+            f"WHERE recipes.author_id = %s AND author.feed_fanout "
+            f"ON CONFLICT (user_id, recipe_id) DO NOTHING",
+            (user_id, author_id),
+        )
+    )
+
+
+def remove_author_from_timeline(user_id, author_id):
+    """После коммита отписки убирает из ленты пользователя
+    рецепты автора."""
+    transaction.on_commit(
+        lambda: execute(
+            f"DELETE FROM {TIMELINE_TABLE} "
+            f"WHERE user_id = %s AND recipe_id IN ("
+            f"SELECT id FROM {RECIPES_TABLE} WHERE author_id = %s)",
+            (user_id, author_id),
+        )
+    )
+
+
+def rebuild_timelines():
+    """Заново заполняет все ленты по текущим подпискам.
+    Возвращает количество записей в лентах."""
+    with transaction.atomic():
+        User.objects.filter(
+            feed_fanout=True, subscribers_count__gt=FEED_FANOUT_LIMIT
+        ).update(feed_fanout=False)
+        execute(f"DELETE FROM {TIMELINE_TABLE}")
+        return execute(
+            f"INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id) "
+            f"SELECT subscribe.user_id, recipes.id "
+            f"FROM {SUBSCRIBE_TABLE} subscribe "
+            f"JOIN {USERS_TABLE} author ON author.id = subscribe.author_id "
+            f"JOIN {RECIPES_TABLE} recipes "
+            f"ON recipes.author_id = subscribe.author_id "
+            f"WHERE author.feed_fanout",
+        )
+
+
+def feed_queryset(queryset, user):
+    """Рецепты из ленты пользователя и рецепты популярных авторов,
+    на которых он подписан и которые не рассылаются по лентам."""
+    return queryset.filter(
+        Q(pk__in=Timeline.objects.filter(user=user).values("recipe"))
+        | Q(
+            author__in=Subscribe.objects.filter(
+                user=user, author__feed_fanout=False
+            ).values("author")
+        )
+    )
@@ -1,5 +1,26 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q
 from django_filters import rest_framework as filters
-from recipes.models import Ingredient, Recipes, Tag
+from recipes.models import (
+    SEARCH_CONFIG,
+    Ingredient,
+    Recipes,
+    Tag,
+    filter_by_tags_mask,
+)
+
+RECIPES_ORDERINGS = {
+    "popular": ("-favorites_count", "-in_carts_count", "-id"),
+    "trending": ("-trending_score", "-id"),
+}
+"""Дополнительные порядки рецептов для параметра ordering."""
 
 
 class IngredientsFilter(filters.FilterSet):
@@ -18,7 +39,8 @@ class RecipesFilter(filters.FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         field_name="tags__slug",
         to_field_name="slug",
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        method="filter_tags",
     )
     is_favorited = filters.BooleanFilter(
         method="filter_is_favorited",
@@ -26,6 +48,11 @@ class RecipesFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart"
     )
+    search = filters.CharFilter(method="filter_search")
+    ordering = filters.ChoiceFilter(
+        choices=tuple((name, name) for name in RECIPES_ORDERINGS),
+        method="filter_ordering",
+    )
 
     class Meta:
         model = Recipes
@@ -34,6 +61,17 @@ class RecipesFilter(filters.FilterSet):
             "author",
             "is_favorited",
             'is_in_shopping_cart',
+            "search",
+            "ordering",
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тегов: проверка битовой маски
+        рецепта без соединения с таблицей тегов."""
+        if not value:
+            return queryset
+        return filter_by_tags_mask(
+            queryset, reduce(or_, (tag.mask for tag in value), 0)
         )
 
     def filter_is_favorited(self, queryset, name, value):
@@ -45,3 +83,17 @@ class RecipesFilter(filters.FilterSet):
         if value and self.request.user.is_authenticated and value:
             return queryset.filter(shopping_cart__user=self.request.user)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию рецепта.
+        Для опечаток учитывается триграммное сходство названия."""
+        query = SearchQuery(value, config=SEARCH_CONFIG)
+        return queryset.annotate(
+            search_rank=SearchRank(F("search_vector"), query),
+            search_similarity=TrigramSimilarity("name", value),
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_similar=value)
+        ).order_by("-search_rank", "-search_similarity", "-pub_date", "-id")
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*RECIPES_ORDERINGS[value])
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from django.core.cache import cache
+from foodgram.settings import CACHE_GENERATION_SECONDS
+
+
+class SharedGeneration:
+    """Версия данных в общем кэше Django, которую воркер держит в памяти.
+
+    Общий кэш перечитывается не чаще раза в check_interval секунд,
+    поэтому горячий путь не ходит в него (и в базу при DatabaseCache).
+    Смена версии в своем процессе видна сразу, в других воркерах -
+    не позже чем через check_interval.
+    """
+
+    def __init__(self, key, check_interval=None):
+        self.key = key
+        self.check_interval = (
+            CACHE_GENERATION_SECONDS
+            if check_interval is None else check_interval
+        )
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._value is not None
+                and now - self._checked_at < self.check_interval
+            ):
+                return self._value
+        value = cache.get(self.key)
+        if value is None:
+            cache.add(self.key, time.time_ns(), timeout=None)
+            value = cache.get(self.key)
+        with self._lock:
+            self._value, self._checked_at = value, now
+        return value
+
+    def bump(self):
+        value = time.time_ns()
+        cache.set(self.key, value, timeout=None)
+        with self._lock:
+            self._value, self._checked_at = value, time.monotonic()
+        return value
+
+    def forget(self):
+        """Забывает версию в памяти: следующий get прочитает общий кэш."""
+        with self._lock:
+            self._value = None
@@ -0,0 +1,72 @@
+import threading
+from bisect import bisect_left
+
+from api.catalog_cache import ingredients_cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Строится при первом поиске отсортированным по названию списком,
+    сбрасывается сигналами при сохранении и удалении ингредиента
+    и при смене версии справочника ingredients_cache (например, после
+    load_ingredients в другом процессе). Версия берется из памяти
+    воркера, поэтому поиск по прогретому индексу не делает запросов;
+    смену версии в другом процессе он видит не позже чем через
+    CACHE_GENERATION_SECONDS.
+    Сначала возвращает совпадения по началу названия, затем по подстроке.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+    def _get_data(self):
+        generation = ingredients_cache.get_generation()
+        data = self._data
+        if data is not None and data[0] == generation:
+            return data[1:]
+        with self._lock:
+            if self._data is None or self._data[0] != generation:
+                rows = sorted(
+                    Ingredient.objects.values(
+                        "id", "name", "measurement_unit"
+                    ),
+                    key=lambda row: (row["name"].casefold(), row["id"]),
+                )
+                keys = [row["name"].casefold() for row in rows]
+                self._data = (generation, keys, rows)
+            return self._data[1:]
+
+    def search(self, query, limit):
+        keys, rows = self._get_data()
+        query = query.strip().casefold()
+        result = []
+        for position in range(bisect_left(keys, query), len(keys)):
+            if len(result) >= limit or not keys[position].startswith(query):
+                break
+            result.append(rows[position])
+        if not query:
+            return result
+        for key, row in zip(keys, rows):
+            if len(result) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                result.append(row)
+        return result
+
+
+ingredient_index = IngredientIndex()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
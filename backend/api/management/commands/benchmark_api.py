@@ -0,0 +1,167 @@
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from api.middleware import QueryStats
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from recipes.models import Ingredient, Recipes, Tag
+from rest_framework.test import APIClient
+from users.models import User
+
+
+def get_endpoints():
+    """Эндпоинты для замера: (название, путь, нужна ли авторизация)."""
+    tag = Tag.objects.order_by("pk").values_list("slug", flat=True).first()
+    ingredient = Ingredient.objects.values_list("name", flat=True).first()
+    if tag is None or ingredient is None:
+        raise CommandError(
+            "Нет тегов или ингредиентов, запустите seed_data."
+        )
+    return (
+        ("recipes-list", "/api/recipes/", False),
+        ("recipes-list-auth", "/api/recipes/", True),
+        ("recipes-list-deep-page", "/api/recipes/?page=50", True),
+        ("recipes-list-tag", f"/api/recipes/?tags={tag}", True),
+        ("recipes-list-cursor", "/api/recipes/?cursor=", True),
+        ("users-subscriptions", "/api/users/subscriptions/", True),
+        (
+            "users-subscriptions-limited",
+            "/api/users/subscriptions/?recipes_limit=3",
+            True,
+        ),
+        (
+            "recipes-download-shopping-cart",
+            "/api/recipes/download_shopping_cart/",
+            True,
+        ),
+        ("tag-list", "/api/tags/", False),
+        (
+            "ingredients-search",
+            f"/api/ingredients/?name={ingredient[:3]}",
+            False,
+        ),
+    )
+
+
+def percentile(values, percent):
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержку, пропускную способность и количество SQL-запросов "
+        "основных эндпоинтов API и сохраняет результат в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--output", help="Файл для сохранения результатов в JSON."
+        )
+        parser.add_argument(
+            "--baseline", help="JSON предыдущего запуска для сравнения."
+        )
+        parser.add_argument(
+            "--endpoint", action="append",
+            help="Замерить только эти эндпоинты.",
+        )
+
+    def get_user(self):
+        """Пользователь с наибольшим числом подписок и рецептов в корзине."""
+        user = User.objects.annotate(
+            subscriptions=Count("subscriber", distinct=True),
+            cart=Count("shopping_cart", distinct=True),
+        ).order_by("-subscriptions", "-cart").first()
+        if user is None:
+            raise CommandError("Нет пользователей, запустите seed_data.")
+        return user
+
+    def measure(self, client, path, count, warmup):
+        for _ in range(warmup):
+            self.request(client, path)
+        durations = []
+        queries = []
+        started = time.perf_counter()
+        for _ in range(count):
+            duration, query_count = self.request(client, path)
+            durations.append(duration)
+            queries.append(query_count)
+        elapsed = time.perf_counter() - started
+        return {
+            "p50_ms": percentile(durations, 50) * 1000,
+            "p95_ms": percentile(durations, 95) * 1000,
+            "p99_ms": percentile(durations, 99) * 1000,
+            "throughput_rps": count / elapsed,
+            "queries_per_request": statistics.mean(queries),
+        }
+
+    @staticmethod
+    def request(client, path):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            start = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            duration = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise CommandError(f"{path}: статус {response.status_code}")
+        return duration, stats.count
+
+    def compare(self, results, baseline_path):
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline = json.load(file)["endpoints"]
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            changes = ", ".join(
+                f"{metric} {100 * (value / baseline[name][metric] - 1):+.1f}%"
+                for metric, value in result.items()
+                if baseline[name].get(metric)
+            )
+            self.stdout.write(f"{name}: {changes}")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно хотя бы 2 запроса на эндпоинт.")
+        anonymous = APIClient()
+        authorized = APIClient()
+        authorized.force_authenticate(self.get_user())
+        results = {}
+        for name, path, auth in get_endpoints():
+            if options["endpoint"] and name not in options["endpoint"]:
+                continue
+            results[name] = self.measure(
+                authorized if auth else anonymous,
+                path,
+                options["requests"],
+                options["warmup"],
+            )
+            self.stdout.write(
+                f"{name}: p50 {results[name]['p50_ms']:.1f} мс, "
+                f"p95 {results[name]['p95_ms']:.1f} мс, "
+                f"p99 {results[name]['p99_ms']:.1f} мс, "
+                f"{results[name]['throughput_rps']:.1f} rps, "
+                f"{results[name]['queries_per_request']:.1f} SQL"
+            )
+        report = {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "dataset": {
+                "users": User.objects.count(),
+                "recipes": Recipes.objects.count(),
+            },
+            "requests": options["requests"],
+            "endpoints": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options["baseline"]:
+            self.compare(results, options["baseline"])
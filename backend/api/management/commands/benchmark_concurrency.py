@@ -0,0 +1,88 @@
+import json
+import socket
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def fetch(url, headers):
+    """Время запроса и статус ответа; None, если ответа нет
+    (отказ в соединении, обрыв, таймаут)."""
+    start = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=30) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    except (socket.timeout, OSError, HTTPException):
+        status = None
+    return time.perf_counter() - start, status
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает запущенный сервер параллельными соединениями и считает "
+        "пропускную способность. Используется для сравнения режимов "
+        "SERVER_MODE=wsgi, threads и asgi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls", nargs="+",
+            help="Адреса, например http://localhost:8000/api/recipes/",
+        )
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--token", help="Токен для заголовка Authorization."
+        )
+        parser.add_argument("--label", default="", help="Название режима.")
+        parser.add_argument("--output", help="Файл для результатов в JSON.")
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+        results = {}
+        for url in options["urls"]:
+            with ThreadPoolExecutor(options["concurrency"]) as executor:
+                start = time.perf_counter()
+                responses = list(executor.map(
+                    lambda _: fetch(url, headers), range(options["requests"])
+                ))
+                elapsed = time.perf_counter() - start
+            durations = sorted(duration for duration, _ in responses)
+            errors = sum(1 for _, status in responses if status != 200)
+            if errors == len(responses):
+                raise CommandError(f"{url}: все запросы завершились ошибкой")
+            quantiles = statistics.quantiles(durations, n=100)
+            results[url] = {
+                "throughput_rps": len(responses) / elapsed,
+                "p50_ms": quantiles[49] * 1000,
+                "p95_ms": quantiles[94] * 1000,
+                "p99_ms": quantiles[98] * 1000,
+                "errors": errors,
+            }
+            self.stdout.write(
+                f"{options['label']} {url}: "
+                f"{results[url]['throughput_rps']:.1f} rps, "
+                f"p50 {results[url]['p50_ms']:.1f} мс, "
+                f"p99 {results[url]['p99_ms']:.1f} мс, ошибок {errors}"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(
+                    {
+                        "label": options["label"],
+                        "concurrency": options["concurrency"],
+                        "results": results,
+                    },
+                    file,
+                    indent=2,
+                )
@@ -0,0 +1,93 @@
+import random
+import time
+
+from api.filters import IngredientsFilter
+from api.ingredient_index import ingredient_index
+from api.management.commands.benchmark_api import percentile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from foodgram.settings import INGREDIENT_SEARCH_LIMIT
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск ингредиентов по названию через индекс в памяти "
+        "и через фильтр IngredientsFilter (icontains в PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--query", action="append",
+            help="Строка поиска; по умолчанию начала и середины "
+                 "случайных названий.",
+        )
+
+    def get_queries(self, rng, count):
+        names = list(Ingredient.objects.values_list("name", flat=True))
+        if not names:
+            raise CommandError(
+                "Нет ингредиентов, запустите load_ingredients."
+            )
+        queries = []
+        for name in rng.choices(names, k=count):
+            length = rng.randint(1, min(4, len(name)))
+            start = rng.choice((0, rng.randrange(len(name) - length + 1)))
+            queries.append(name[start:start + length])
+        return queries
+
+    def search_orm(self, query):
+        return list(
+            IngredientsFilter(
+                {"name": query}, queryset=Ingredient.objects.all()
+            ).qs.values("id", "name", "measurement_unit")
+        )
+
+    def search_index(self, query):
+        return ingredient_index.search(query, INGREDIENT_SEARCH_LIMIT)
+
+    def measure(self, search, queries):
+        durations = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            durations.append(time.perf_counter() - start)
+        return percentile(durations, 50), percentile(durations, 95)
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно хотя бы 2 запроса.")
+        rng = random.Random(options["seed"])
+        queries = options["query"] or self.get_queries(
+            rng, options["requests"]
+        )
+        queries = [queries[i % len(queries)]
+                   for i in range(options["requests"])]
+        ingredient_index.search("", 1)
+        for query in set(queries):
+            found = {row["id"] for row in self.search_index(query)}
+            expected = {row["id"] for row in self.search_orm(query)}
+            if not found <= expected or (
+                len(found) < INGREDIENT_SEARCH_LIMIT and found != expected
+            ):
+                raise CommandError(
+                    f"Индекс и фильтр нашли разное для «{query}»."
+                )
+        self.stdout.write(
+            f"Ингредиентов: {Ingredient.objects.count()}, "
+            f"запросов: {len(queries)}"
+        )
+        for name, search in (
+            ("orm", self.search_orm),
+            ("index", self.search_index),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                p50, p95 = self.measure(search, queries)
+            self.stdout.write(
+                f"{name}: p50 {p50 * 1000:.3f} мс, "
+                f"p95 {p95 * 1000:.3f} мс, "
+                f"SQL-запросов {len(context.captured_queries)}"
+            )
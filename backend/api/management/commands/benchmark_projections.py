@@ -0,0 +1,109 @@
+import time
+
+from api.management.commands.benchmark_api import percentile
+from api.projections import (
+    project_ingredients,
+    project_recipes,
+    project_tags,
+    recipes_values,
+)
+from api.serializers import (
+    IngredientSerilizer,
+    RecipesSerializer,
+    TagSerializer,
+)
+from api.views import RecipesViewSet
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Ingredient, Recipes, Tag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет, что проекции списков рецептов, ингредиентов и тегов "
+        "совпадают с выводом сериализаторов, и сравнивает время "
+        "на один объект."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument(
+            "--page-size", type=int, default=100,
+            help="Сколько рецептов в странице.",
+        )
+
+    def get_request(self):
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        user = User.objects.order_by("pk").first()
+        if user is not None:
+            request.user = user
+        return request
+
+    def get_cases(self, request, page_size):
+        view = RecipesViewSet(
+            request=request, format_kwarg=None, kwargs={}, action="list"
+        )
+        recipes = view.get_queryset()[:page_size]
+        rows = recipes_values(
+            view.annotate_user_flags(Recipes.objects.all())
+        )[:page_size]
+        context = {"request": request}
+        tags = Tag.objects.all()
+        ingredients = Ingredient.objects.all()
+        return (
+            (
+                "recipes",
+                lambda: RecipesSerializer(
+                    recipes.all(), many=True, context=context
+                ).data,
+                lambda: project_recipes(rows.all(), request),
+            ),
+            (
+                "tags",
+                lambda: TagSerializer(
+                    tags.all(), many=True, context=context
+                ).data,
+                lambda: project_tags(tags.all()),
+            ),
+            (
+                "ingredients",
+                lambda: IngredientSerilizer(
+                    ingredients.all(), many=True, context=context
+                ).data,
+                lambda: project_ingredients(ingredients.all()),
+            ),
+        )
+
+    def measure(self, function, count):
+        durations = []
+        for _ in range(count):
+            start = time.perf_counter()
+            size = len(function())
+            durations.append(time.perf_counter() - start)
+        return percentile(durations, 50), size
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно хотя бы 2 запроса.")
+        request = self.get_request()
+        renderer = JSONRenderer()
+        for name, serialize, project in self.get_cases(
+            request, options["page_size"]
+        ):
+            if renderer.render(serialize()) != renderer.render(project()):
+                raise CommandError(
+                    f"{name}: проекция отличается от сериализатора."
+                )
+            for label, function in (
+                ("serializer", serialize),
+                ("projection", project),
+            ):
+                p50, size = self.measure(function, options["requests"])
+                per_object = p50 / size * 1_000_000 if size else 0
+                self.stdout.write(
+                    f"{name} {label}: p50 {p50 * 1000:.2f} мс, "
+                    f"{per_object:.1f} мкс на объект, объектов {size}"
+                )
@@ -0,0 +1,89 @@
+import io
+import time
+
+from api.management.commands.benchmark_api import percentile
+from api.parsers import FastJSONParser, orjson
+from api.renderers import FastJSONRenderer
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время рендеринга больших страниц рецептов "
+        "и разбора JSON стандартными классами DRF и классами на orjson."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument(
+            "--page-size", type=int, action="append",
+            help="Размер страницы рецептов; по умолчанию 6, 100 и 500.",
+        )
+
+    def get_page(self, client, page_size):
+        response = client.get(f"/api/recipes/?limit={page_size}")
+        if response.status_code != 200:
+            raise CommandError(
+                f"/api/recipes/ вернул {response.status_code}."
+            )
+        return response.data
+
+    def measure(self, function, count):
+        durations = []
+        for _ in range(count):
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+        return percentile(durations, 50), percentile(durations, 95)
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно хотя бы 2 запроса.")
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson не установлен, быстрые классы работают "
+                    "как стандартные."
+                )
+            )
+        client = APIClient()
+        user = User.objects.order_by("pk").first()
+        if user is not None:
+            client.force_authenticate(user)
+        for page_size in options["page_size"] or (6, 100, 500):
+            data = self.get_page(client, page_size)
+            rendered = {}
+            for name, renderer in (
+                ("json", JSONRenderer()),
+                ("orjson", FastJSONRenderer()),
+            ):
+                rendered[name] = renderer.render(data)
+                p50, p95 = self.measure(
+                    lambda: renderer.render(data), options["requests"]
+                )
+                self.stdout.write(
+                    f"limit={page_size} render {name}: "
+                    f"p50 {p50 * 1000:.2f} мс, p95 {p95 * 1000:.2f} мс"
+                )
+            if rendered["json"] != rendered["orjson"]:
+                raise CommandError(
+                    f"limit={page_size}: вывод рендереров различается."
+                )
+            body = rendered["json"]
+            for name, parser in (
+                ("json", JSONParser()),
+                ("orjson", FastJSONParser()),
+            ):
+                p50, p95 = self.measure(
+                    lambda: parser.parse(io.BytesIO(body)),
+                    options["requests"],
+                )
+                self.stdout.write(
+                    f"limit={page_size} parse {name}: "
+                    f"p50 {p50 * 1000:.2f} мс, p95 {p95 * 1000:.2f} мс, "
+                    f"{len(body)} байт"
+                )
@@ -0,0 +1,76 @@
+import time
+from functools import reduce
+from operator import or_
+
+from api.management.commands.benchmark_api import percentile
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Recipes, Tag, filter_by_tags_mask
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает фильтрацию рецептов по тегам через соединение "
+        "с таблицей тегов и через битовую маску рецепта."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=6)
+        parser.add_argument(
+            "--tag", action="append",
+            help="Слаг тега; по умолчанию все теги, кроме первого.",
+        )
+
+    def get_querysets(self, tags):
+        recipes = Recipes.objects.all()
+        mask = reduce(or_, (tag.mask for tag in tags), 0)
+        return (
+            (
+                "join",
+                recipes.filter(
+                    tags__slug__in=[tag.slug for tag in tags]
+                ).distinct(),
+            ),
+            ("mask", filter_by_tags_mask(recipes, mask)),
+        )
+
+    def measure(self, get_result, count):
+        durations = []
+        for _ in range(count):
+            start = time.perf_counter()
+            get_result()
+            durations.append(time.perf_counter() - start)
+        return percentile(durations, 50), percentile(durations, 95)
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно хотя бы 2 запроса.")
+        tags = Tag.objects.order_by("bit")
+        if options["tag"]:
+            tags = tags.filter(slug__in=options["tag"])
+        else:
+            tags = tags[1:]
+        tags = list(tags)
+        if not tags:
+            raise CommandError("Нет тегов, запустите seed_data.")
+        self.stdout.write(
+            f"Теги: {', '.join(tag.slug for tag in tags)}, "
+            f"рецептов: {Recipes.objects.count()}"
+        )
+        page_size = options["page_size"]
+        pages = {}
+        for name, queryset in self.get_querysets(tags):
+            pages[name] = list(
+                queryset.values_list("pk", flat=True)[:page_size]
+            )
+            for label, get_result in (
+                ("page", lambda: list(queryset[:page_size])),
+                ("count", queryset.count),
+            ):
+                p50, p95 = self.measure(get_result, options["requests"])
+                self.stdout.write(
+                    f"{name} {label}: p50 {p50 * 1000:.2f} мс, "
+                    f"p95 {p95 * 1000:.2f} мс"
+                )
+        if pages["join"] != pages["mask"]:
+            raise CommandError("Результаты фильтрации различаются.")
@@ -0,0 +1,263 @@
+import hmac
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.http import HttpResponse, HttpResponseForbidden
+from foodgram.settings import (
+    METRICS_DIR,
+    METRICS_FLUSH_INTERVAL,
+    METRICS_TOKEN,
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+AUTH_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+serialization_timer = ContextVar("serialization_timer", default=None)
+"""SerializationTimer текущего запроса, его ставит MetricsMiddleware."""
+
+
+class SerializationTimer:
+    """Время сериализации за запрос. Вложенные вызовы (сериализатор
+    внутри сериализатора) входят во внешний и не считаются дважды."""
+
+    def __init__(self):
+        self.duration = 0.0
+        self.calls = 0
+        self.depth = 0
+
+
+@contextmanager
+def timed_serialization():
+    """Прибавляет время блока к SerializationTimer запроса.
+    Работает и как декоратор."""
+    timer = serialization_timer.get()
+    if timer is None:
+        yield
+        return
+    timer.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.depth -= 1
+        if not timer.depth:
+            timer.duration += time.perf_counter() - start
+            timer.calls += 1
+
+
+class TimedSerializer:
+    """Обертка сериализатора во вьюхе: чтение data, где
+    to_representation превращает объекты в словари, попадает
+    в SerializationTimer запроса. Остальное передается сериализатору."""
+
+    def __init__(self, serializer):
+        object.__setattr__(self, "serializer", serializer)
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return self.serializer.data
+
+    def __getattr__(self, name):
+        return getattr(self.serializer, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.serializer, name, value)
+
+
+class SerializationTimingMixin:
+    """Замеряет сериализацию в сериализаторах из get_serializer."""
+
+    def get_serializer(self, *args, **kwargs):
+        return TimedSerializer(super().get_serializer(*args, **kwargs))
+
+
+class MetricsRegistry:
+    """Счетчики и гистограммы в формате Prometheus.
+
+    Значения копятся в памяти процесса. Если задан METRICS_DIR, каждый
+    воркер gunicorn периодически сбрасывает их в свой файл, а /metrics
+    суммирует файлы всех воркеров.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self.samples = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        self._filename = f"{os.getpid()}-{time.time_ns()}.json"
+
+    def counter(self, name, documentation):
+        self.metrics[name] = ("counter", documentation, None)
+
+    def histogram(self, name, documentation, buckets):
+        self.metrics[name] = ("histogram", documentation, tuple(buckets))
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self.samples[name].setdefault(key, [0])
+            values[0] += value
+
+    def observe(self, name, value, **labels):
+        buckets = self.metrics[name][2]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self.samples[name].get(key)
+            if values is None:
+                values = self.samples[name][key] = [0] * (len(buckets) + 2)
+            for position, bound in enumerate(buckets):
+                if value <= bound:
+                    values[position] += 1
+                    break
+            values[-2] += value
+            values[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: [[list(key), list(values)] for key, values in
+                       samples.items()]
+                for name, samples in self.samples.items()
+            }
+
+    def flush(self, force=False):
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        self._flushed_at = now
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / self._filename
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Суммирует значения всех воркеров."""
+        if self.directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush(force=True)
+            snapshots = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        totals = defaultdict(dict)
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                for key, values in samples:
+                    key = tuple(tuple(label) for label in key)
+                    current = totals[name].get(key)
+                    if current is None:
+                        totals[name][key] = list(values)
+                    else:
+                        for position, value in enumerate(values):
+                            current[position] += value
+        return totals
+
+    def render(self):
+        totals = self.collect()
+        lines = []
+        for name, (kind, documentation, buckets) in self.metrics.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, values in sorted(totals.get(name, {}).items()):
+                if kind == "counter":
+                    lines.append(f"{name}{format_labels(key)} {values[0]}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, values):
+                    cumulative += count
+                    labels = format_labels(key + (("le", str(bound)),))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = format_labels(key + (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{labels} {values[-1]}")
+                lines.append(f"{name}_sum{format_labels(key)} {values[-2]}")
+                lines.append(f"{name}_count{format_labels(key)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"')
+         .replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+registry = MetricsRegistry(METRICS_DIR, METRICS_FLUSH_INTERVAL)
+registry.histogram(
+    "foodgram_request_duration_seconds",
+    "Время обработки запроса по вьюсету и действию.",
+    LATENCY_BUCKETS,
+)
+registry.histogram(
+    "foodgram_request_db_queries",
+    "Количество SQL-запросов на один HTTP-запрос.",
+    QUERY_COUNT_BUCKETS,
+)
+registry.histogram(
+    "foodgram_request_db_duration_seconds",
+    "Время выполнения SQL-запросов на один HTTP-запрос.",
+    LATENCY_BUCKETS,
+)
+registry.histogram(
+    "foodgram_serialization_duration_seconds",
+    "Время сериализации объектов (serializer.data и проекции) на запрос.",
+    LATENCY_BUCKETS,
+)
+registry.histogram(
+    "foodgram_response_render_duration_seconds",
+    "Время рендеринга готовых данных ответа DRF в байты (JSON).",
+    LATENCY_BUCKETS,
+)
+registry.counter(
+    "foodgram_catalog_cache_requests_total",
+    "Запросы к кэшу справочников по результату.",
+)
+registry.counter(
+    "foodgram_token_auth_requests_total",
+    "Проверки токенов по источнику: hit (память) или miss (база).",
+)
+registry.histogram(
+    "foodgram_token_auth_duration_seconds",
+    "Время проверки токена по источнику.",
+    AUTH_LATENCY_BUCKETS,
+)
+registry.counter(
+    "foodgram_token_auth_saved_seconds_total",
+    "Оценка времени, сэкономленного попаданиями в кэш токенов.",
+)
+
+
+def metrics_view(request):
+    """Метрики для Prometheus с METRICS_TOKEN или для сотрудника."""
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    if not (
+        METRICS_TOKEN
+        and hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}")
+        or request.user.is_authenticated and request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
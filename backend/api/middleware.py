@@ -0,0 +1,129 @@
+import time
+from contextlib import ExitStack
+
+from api.db_router import use_replica
+from api.metrics import SerializationTimer, registry, serialization_timer
+from django.db import connections
+from foodgram.settings import REPLICA_READ_VIEWS, REPLICA_STICKY_SECONDS
+from rest_framework.permissions import SAFE_METHODS
+
+UNRESOLVED_VIEW = "unresolved"
+PRIMARY_READS_COOKIE = "primary_reads"
+PRIMARY_READS_SALT = "api.middleware.primary-reads"
+
+
+class QueryStats:
+    """Обертка execute: считает SQL-запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Записывает время запроса, количество и время SQL-запросов,
+    время сериализации и время рендеринга ответа по имени маршрута
+    (recipes-list и т.п.)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        timer = SerializationTimer()
+        token = serialization_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            serialization_timer.reset(token)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else UNRESOLVED_VIEW
+        registry.observe(
+            "foodgram_request_duration_seconds",
+            duration,
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        registry.observe("foodgram_request_db_queries", stats.count, view=view)
+        registry.observe(
+            "foodgram_request_db_duration_seconds", stats.duration, view=view
+        )
+        if timer.calls:
+            registry.observe(
+                "foodgram_serialization_duration_seconds",
+                timer.duration,
+                view=view,
+            )
+        render_duration = getattr(response, "render_duration", None)
+        if render_duration is not None:
+            registry.observe(
+                "foodgram_response_render_duration_seconds",
+                render_duration,
+                view=view,
+            )
+        registry.flush()
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def store_render_duration(rendered):
+            rendered.render_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(store_render_duration)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Разрешает чтение из реплики для безопасных запросов к
+    REPLICA_READ_VIEWS. После POST/PATCH/DELETE клиент получает
+    подписанную cookie, и REPLICA_STICKY_SECONDS секунд его запросы
+    в любом воркере идут в основную базу, чтобы он видел собственные
+    изменения."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+        if request.method not in SAFE_METHODS:
+            response.set_signed_cookie(
+                PRIMARY_READS_COOKIE,
+                "1",
+                salt=PRIMARY_READS_SALT,
+                max_age=REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and request.resolver_match.url_name in REPLICA_READ_VIEWS
+            and request.get_signed_cookie(
+                PRIMARY_READS_COOKIE,
+                default=None,
+                salt=PRIMARY_READS_SALT,
+                max_age=REPLICA_STICKY_SECONDS,
+            ) is None
+        ):
+            use_replica.set(True)
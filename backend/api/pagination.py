@@ -1,4 +1,123 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Func, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    Cursor,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+
+
+class Row(Func):
+    """Конструктор строки PostgreSQL: ROW(a, b) < ROW(x, y)
+    сравнивает кортежи и использует составной индекс."""
+
+    function = "ROW"
+    output_field = Field()
+
+
+class CursorLimitPagination(CursorPagination):
+    """Курсорная пагинация /?cursor=<string>&limit=<integer>.
+    Не считает общее количество объектов и не использует OFFSET.
+    Порядок берется из атрибута cursor_ordering вьюсета.
+
+    Курсор хранит значения всех полей порядка у крайнего объекта
+    страницы, например (pub_date, id): следующая страница выбирается
+    условием ROW(pub_date, id) < ROW(...), поэтому одинаковые значения
+    первого поля не ломают пагинацию. Все поля порядка должны идти
+    в одном направлении и заканчиваться уникальным полем.
+    """
+
+    page_size = 6
+    page_size_query_param = "limit"
+    page_size_query_description = "Количество объектов на странице."
+    ordering = ("-pub_date", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, "cursor_ordering", self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = _reverse_ordering(self.ordering) if reverse else (
+            self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        position = self.cursor.position if self.cursor else None
+        if position is not None:
+            queryset = self.filter_after(queryset, ordering, position)
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def filter_after(self, queryset, ordering, position):
+        """Объекты строго после позиции курсора в порядке ordering."""
+        fields = [
+            queryset.model._meta.get_field(name.lstrip("-"))
+            for name in ordering
+        ]
+        try:
+            values = json.loads(position)
+            if len(values) != len(fields):
+                raise ValueError
+            values = [
+                Value(field.to_python(value), output_field=field)
+                for field, value in zip(fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        lookup = "lt" if ordering[0].startswith("-") else "gt"
+        return queryset.alias(
+            cursor_position=Row(*(field.attname for field in fields))
+        ).filter(**{f"cursor_position__{lookup}": Row(*values)})
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Значения полей порядка; даты с микросекундами, чтобы
+        позиция совпадала со значением в базе."""
+        return json.dumps(
+            [
+                instance[name] if isinstance(instance, dict)
+                else getattr(instance, name)
+                for name in (field.lstrip("-") for field in ordering)
+            ],
+            default=lambda value: value.isoformat(),
+        )
+
+    def get_link(self, instance, reverse):
+        if instance is None:
+            position = self.cursor.position if self.cursor else None
+        else:
+            position = self._get_position_from_instance(
+                instance, self.ordering
+            )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=reverse, position=position)
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(self.page[-1] if self.page else None, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.get_link(self.page[0] if self.page else None, True)
 
 
 class PageLimitPagination(PageNumberPagination):
@@ -10,3 +129,25 @@ class PageLimitPagination(PageNumberPagination):
     page_size_query_param = "limit"
     page_query_description = "Номер страницы."
     page_size_query_description = "Количество объектов на странице."
+
+
+class PageOrCursorPagination(PageLimitPagination):
+    """Постраничная пагинация по умолчанию и курсорная,
+    если в запросе передан параметр cursor."""
+
+    cursor_pagination_class = CursorLimitPagination
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
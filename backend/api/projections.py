@@ -0,0 +1,136 @@
+from collections import defaultdict
+
+from api.metrics import timed_serialization
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from recipes.models import AmountIngredient, Recipes, Tag
+
+TAG_FIELDS = ("id", "name", "color", "slug")
+INGREDIENT_FIELDS = ("id", "name", "measurement_unit")
+AMOUNT_FIELDS = ("id", "name", "measurement_unit", "amount")
+AUTHOR_FIELDS = ("email", "id", "username", "first_name", "last_name")
+RECIPE_FIELDS = (
+    "id",
+    "name",
+    "image",
+    "image_variants",
+    "text",
+    "cooking_time",
+    "is_favorited",
+    "is_in_shopping_cart",
+    "author_is_subscribed",
+    *(f"author__{field}" for field in AUTHOR_FIELDS),
+)
+"""Поля рецепта и автора, из которых project_recipes собирает ответ."""
+
+
+def build_file_url(name, request=None):
+    """Ссылка на файл в хранилище, как ее отдает ImageField DRF."""
+    if not name:
+        return None
+    url = default_storage.url(name)
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    return url
+
+
+def build_image_variants(image_variants, request=None):
+    """Ссылки на уменьшенные копии картинки по размеру и формату."""
+    return {
+        variant: {
+            extension: build_file_url(path, request)
+            for extension, path in paths.items()
+        }
+        for variant, paths in image_variants.items()
+    }
+
+
+def recipes_prefetches():
+    """Теги и ингредиенты для RecipesSerializer в том же порядке,
+    в каком их отдает project_recipes."""
+    return (
+        Prefetch("tags", queryset=Tag.objects.order_by("id")),
+        Prefetch(
+            "amount_recipe",
+            queryset=AmountIngredient.objects.select_related(
+                "ingredient"
+            ).order_by("id"),
+        ),
+    )
+
+
+@timed_serialization()
+def project_tags(queryset):
+    """Теги в том же виде, что TagSerializer."""
+    return list(queryset.values(*TAG_FIELDS))
+
+
+@timed_serialization()
+def project_ingredients(queryset):
+    """Ингредиенты в том же виде, что IngredientSerilizer."""
+    return list(queryset.values(*INGREDIENT_FIELDS))
+
+
+def recipes_values(queryset, *extra_fields):
+    """Строки рецептов для project_recipes. extra_fields нужны
+    пагинации, например первое поле порядка для курсора."""
+    fields = RECIPE_FIELDS + tuple(
+        field for field in extra_fields if field not in RECIPE_FIELDS
+    )
+    return queryset.values(*fields)
+
+
+@timed_serialization()
+def project_recipes(rows, request=None):
+    """Рецепты в том же виде, что RecipesSerializer, из строк
+    recipes_values: теги и ингредиенты страницы читаются
+    двумя запросами, поля DRF не создаются."""
+    rows = list(rows)
+    tags = defaultdict(list)
+    amounts = defaultdict(list)
+    ids = [row["id"] for row in rows]
+    if ids:
+        for recipe_id, *values in (
+            Recipes.tags.through.objects.filter(recipes_id__in=ids)
+            .order_by("tag_id")
+            .values_list(
+                "recipes_id", *(f"tag__{field}" for field in TAG_FIELDS)
+            )
+        ):
+            tags[recipe_id].append(dict(zip(TAG_FIELDS, values)))
+        for recipe_id, *values in (
+            AmountIngredient.objects.filter(recipe_id__in=ids)
+            .order_by("id")
+            .values_list(
+                "recipe_id",
+                "ingredient__id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        ):
+            amounts[recipe_id].append(dict(zip(AMOUNT_FIELDS, values)))
+    return [
+        {
+            "id": row["id"],
+            "tags": tags[row["id"]],
+            "author": {
+                **{
+                    field: row[f"author__{field}"]
+                    for field in AUTHOR_FIELDS
+                },
+                "is_subscribed": row["author_is_subscribed"],
+            },
+            "ingredients": amounts[row["id"]],
+            "is_favorited": row["is_favorited"],
+            "is_in_shopping_cart": row["is_in_shopping_cart"],
+            "name": row["name"],
+            "image": build_file_url(row["image"], request),
+            "image_variants": build_image_variants(
+                row["image_variants"], request
+            ),
+            "text": row["text"],
+            "cooking_time": row["cooking_time"],
+        }
+        for row in rows
+    ]
@@ -1,8 +1,10 @@
 import base64
 
+from api.projections import build_image_variants, recipes_prefetches
 from django.core.files.base import ContentFile
 from django.core.validators import EmailValidator
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.fields import RegexField
 from djoser.serializers import UserCreateSerializer, UserSerializer
@@ -11,7 +13,9 @@ from foodgram.settings import (
     HEX_VALID,
     MIN_INGREDIENT_AMOUNT,
     MAX_INGREDIENT_AMOUNT,
+    RECIPES_BATCH_LIMIT,
 )
+from recipes.images import reset_image_variants, schedule_image_variants
 from recipes.models import (
     AmountIngredient,
     Favorite,
@@ -31,6 +35,7 @@ COOKING_TIME_VALID = (
     f"Время приготовления должно быть не меньше {MIN_COOKING_TIME} минуты"
 )
 TAG_VALID = "Такого тега нет, создайте его"
+INGREDIENT_NOT_FOUND = "Такого ингредиента нет"
 
 
 class CreateUserSerializer(UserCreateSerializer):
@@ -68,6 +73,8 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context["request"].user
         if user.is_authenticated:
             return Subscribe.objects.filter(user=user, author=obj).exists()
@@ -140,6 +147,7 @@ class RecipesSerializer(serializers.ModelSerializer):
         method_name="get_is_favorited")
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name="get_is_in_shopping_cart")
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipes
@@ -152,15 +160,32 @@ class RecipesSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
 
+    def to_representation(self, instance):
+        """Передает автору аннотацию подписки, посчитанную во вьюсете."""
+        if hasattr(instance, "author_is_subscribed"):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+    def get_image_variants(self, obj):
+        """Ссылки на уменьшенные копии картинки по размеру и формату."""
+        return build_image_variants(
+            obj.image_variants, self.context.get("request")
+        )
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         user = self.context["request"].user.id
         return Favorite.objects.filter(user=user, recipe=obj.id).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         user = self.context["request"].user.id
         return ShoppingCart.objects.filter(user=user, recipe=obj.id).exists()
 
@@ -196,6 +221,9 @@ class RecipesSerializer(serializers.ModelSerializer):
             if ingredient["ingredient"] in ingredients:
                 raise serializers.ValidationError(INGREDIENT_ON_LIST)
             ingredients.append(ingredient["ingredient"])
+        ids = [ingredient["id"] for ingredient in ingredients]
+        if len(Ingredient.objects.in_bulk(ids)) != len(ids):
+            raise serializers.ValidationError(INGREDIENT_NOT_FOUND)
         return value
 
 
@@ -213,36 +241,82 @@ class Base64ImageField(serializers.ImageField):
 class RecipesPostUpdateSerializer(RecipesSerializer):
     """Сериалайзер для создания, обновления и удаления рецептов."""
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True)
+    tags = serializers.ListField(child=serializers.IntegerField())
     image = Base64ImageField()
 
+    def validate_tags(self, value):
+        tags = Tag.objects.in_bulk(value)
+        if len(tags) != len(set(value)):
+            raise serializers.ValidationError(TAG_VALID)
+        return [tags[pk] for pk in value]
+
+    @staticmethod
+    def get_amounts(ingredients_data):
+        """Возвращает словарь {id ингредиента: количество}."""
+        return {
+            ingredient_data["ingredient"]["id"]: ingredient_data["amount"]
+            for ingredient_data in ingredients_data
+        }
+
+    @staticmethod
+    def create_amounts(recipe, amounts):
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(
+                recipe=recipe, ingredient_id=pk, amount=amount
+            )
+            for pk, amount in amounts.items()
+        )
+
+    def update_amounts(self, recipe, amounts):
+        """Записывает только добавленные, удаленные
+        и изменившиеся количества ингредиентов."""
+        current = {
+            amount.ingredient_id: amount
+            for amount in AmountIngredient.objects.filter(recipe=recipe)
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            AmountIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for pk, amount in amounts.items():
+            if pk in current and current[pk].amount != amount:
+                current[pk].amount = amount
+                changed.append(current[pk])
+        if changed:
+            AmountIngredient.objects.bulk_update(changed, ("amount",))
+        self.create_amounts(
+            recipe,
+            {
+                pk: amount for pk, amount in amounts.items()
+                if pk not in current
+            },
+        )
+
     @transaction.atomic
     def create(self, validated_data):
-        # print(validated_data)
         tags_data = validated_data.pop('tags')
         ingredients_data = validated_data.pop("amount_recipe")
         recipe = Recipes.objects.create(**validated_data)
         recipe.tags.set(tags_data)
-
-        for ingredient_data in ingredients_data:
-            pk = ingredient_data["ingredient"]["id"]
-            ingredient = Ingredient.objects.get(pk=pk)
-            amount = ingredient_data["amount"]
-            AmountIngredient.objects.create(
-                recipe=recipe, ingredient=ingredient, amount=amount
-            )
+        self.create_amounts(recipe, self.get_amounts(ingredients_data))
+        schedule_image_variants(recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        instance.name = validated_data.get("name", instance.name)
-        instance.text = validated_data.get("text", instance.text)
-        instance.cooking_time = validated_data.get(
-            "cooking_time", instance.cooking_time
-        )
-        instance.image = validated_data.get("image", instance.image)
-        instance.save()
+        fields = [
+            field for field in ("name", "text", "cooking_time", "image")
+            if field in validated_data
+        ]
+        for field in fields:
+            setattr(instance, field, validated_data[field])
+        if "image" in validated_data:
+            reset_image_variants(instance)
+            fields.append("image_variants")
+        if fields:
+            instance.save(update_fields=fields)
 
         tags_data = validated_data.get("tags")
         if tags_data:
@@ -250,14 +324,7 @@ class RecipesPostUpdateSerializer(RecipesSerializer):
 
         ingredients_data = validated_data.get("amount_recipe")
         if ingredients_data:
-            AmountIngredient.objects.filter(recipe=instance).delete()
-            for ingredient_data in ingredients_data:
-                pk = ingredient_data["ingredient"]["id"]
-                ingredient = Ingredient.objects.get(pk=pk)
-                amount = ingredient_data["amount"]
-                AmountIngredient.objects.create(
-                    recipe=instance, ingredient=ingredient, amount=amount
-                )
+            self.update_amounts(instance, self.get_amounts(ingredients_data))
         return instance
 
     def to_representation(self, instance):
@@ -266,6 +333,7 @@ class RecipesPostUpdateSerializer(RecipesSerializer):
         Нужно что бы теги в модели возвращали не id, а список полей."""
         request = self.context.get('request')
         context = {'request': request}
+        prefetch_related_objects((instance,), *recipes_prefetches())
         return RecipesSerializer(instance, context=context).data
 
 
@@ -277,6 +345,19 @@ class CartSerializer(RecipesSerializer):
         fields = ("id", "name", "image", "cooking_time")
 
 
+class RecipesBatchSerializer(serializers.Serializer):
+    """Список id рецептов для пакетного добавления в избранное или корзину."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=RECIPES_BATCH_LIMIT,
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
 class SubscribeSerializer(CustomUserSerializer):
     """Сериалайзер для подписок"""
 
@@ -298,13 +379,20 @@ class SubscribeSerializer(CustomUserSerializer):
         )
 
     def get_recipes(self, obj):
+        if hasattr(obj, "limited_recipes"):
+            return CartSerializer(obj.limited_recipes, many=True).data
         recipes = obj.recipes.all()
+        recipes_limit = self.context.get("recipes_limit")
+        if recipes_limit:
+            recipes = recipes[:recipes_limit]
         return CartSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Subscribe.objects.filter(
@@ -0,0 +1,48 @@
+from django.db import connection, transaction
+from recipes.models import AmountIngredient, ShoppingCart, ShoppingListItem
+
+LIST_TABLE = ShoppingListItem._meta.db_table
+AMOUNTS_TABLE = AmountIngredient._meta.db_table
+CART_TABLE = ShoppingCart._meta.db_table
+
+EXPECTED_SQL = (
+    f"SELECT cart.user_id, amounts.ingredient_id, "
+    f"SUM(amounts.amount) AS amount "
+    f"FROM {CART_TABLE} cart "
+    f"JOIN {AMOUNTS_TABLE} amounts ON amounts.recipe_id = cart.recipe_id "
+    f"GROUP BY cart.user_id, amounts.ingredient_id"
+)
+"""Суммы ингредиентов, посчитанные заново по корзинам."""
+
+
+def diff_shopping_lists():
+    """Возвращает строки (user_id, ingredient_id, ожидаемое, сохраненное),
+    в которых список покупок расходится с корзинами."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(expected.user_id, saved.user_id), "
+            f"COALESCE(expected.ingredient_id, saved.ingredient_id), "
+            f"expected.amount, saved.amount "
+            f"FROM ({EXPECTED_SQL}) expected "
+            f"FULL JOIN {LIST_TABLE} saved "
+            f"ON saved.user_id = expected.user_id "
+            f"AND saved.ingredient_id = expected.ingredient_id "
+            f"WHERE expected.amount IS DISTINCT FROM saved.amount "
+            f"ORDER BY 1, 2"
+        )
+        return cursor.fetchall()
+
+
+@transaction.atomic
+def rebuild_shopping_lists():
+    """Заново считает все списки покупок по корзинам."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {CART_TABLE}, {AMOUNTS_TABLE} IN SHARE MODE"
+        )
+        cursor.execute(f"DELETE FROM {LIST_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {LIST_TABLE} (user_id, ingredient_id, amount) "
+            f"{EXPECTED_SQL}"
+        )
+        return cursor.rowcount
@@ -0,0 +1,110 @@
+import pytest
+from api.authentication import token_cache
+from api.catalog_cache import ingredients_cache, tags_cache
+from django.db.models import F
+from recipes.models import AmountIngredient, Ingredient, Recipes, Tag
+from rest_framework.test import APIClient
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def forget_generations():
+    """Общий кэш в базе откатывается после теста, поэтому
+    версии в памяти процесса тоже забываются."""
+    yield
+    for generation in (
+        tags_cache.generation,
+        ingredients_cache.generation,
+        token_cache.generation,
+    ):
+        generation.forget()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username="cook",
+        email="cook@example.org",
+        first_name="Повар",
+        last_name="Первый",
+        password="Secret-pass1",
+    )
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(
+        username="author",
+        email="author@example.org",
+        first_name="Автор",
+        last_name="Рецептов",
+        password="Secret-pass1",
+    )
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    client = APIClient()
+    client.force_authenticate(author)
+    return client
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=name, color=color, slug=slug)
+        for name, color, slug in (
+            ("Завтрак", "#E26C2D", "breakfast"),
+            ("Обед", "#49B64E", "lunch"),
+        )
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(
+            name=f"Ингредиент {number}", measurement_unit="г"
+        )
+        for number in range(40)
+    ]
+
+
+@pytest.fixture
+def make_recipe(author, tags, ingredients):
+    """Создает рецепт автора с тегами и первыми count ингредиентами."""
+
+    def make_recipe(number, count=3, **fields):
+        recipe = Recipes.objects.create(
+            author=author,
+            name=f"Рецепт {number}",
+            text="Описание",
+            image="recipes/test.png",
+            cooking_time=10,
+            **fields,
+        )
+        recipe.tags.set(tags[: 1 + number % len(tags)])
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(
+                recipe=recipe, ingredient=ingredient, amount=number + 1
+            )
+            for ingredient in ingredients[:count]
+        )
+        User.objects.filter(pk=author.pk).update(
+            recipes_count=F("recipes_count") + 1
+        )
+        return recipe
+
+    return make_recipe
@@ -0,0 +1,58 @@
+from api.authentication import CachedTokenAuthentication, TokenCache
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+authentication = CachedTokenAuthentication()
+
+
+def test_cached_user_reads_fresh_counters(user, django_assert_num_queries):
+    token = Token.objects.create(user=user)
+    authentication.authenticate_credentials(token.key)
+    User.objects.filter(pk=user.pk).update(subscribers_count=7)
+
+    with django_assert_num_queries(0):
+        cached, _ = authentication.authenticate_credentials(token.key)
+
+    assert cached.subscribers_count == 7
+    cached.first_name = "Другое"
+    cached.save()
+    user.refresh_from_db()
+    assert user.subscribers_count == 7
+
+
+def test_logout_invalidates_other_workers(user):
+    """Другой воркер с собственным кэшем в памяти перестает
+    принимать токен после выхода, как только перечитает поколение."""
+    token = Token.objects.create(user=user)
+    key = token.key
+    other_worker = TokenCache(max_size=10, ttl=60, check_interval=0)
+    other_worker.put(key, user, token, other_worker.stamp())
+    assert other_worker.get(key, other_worker.stamp()) is not None
+
+    token.delete()
+
+    assert other_worker.get(key, other_worker.stamp()) is None
+
+
+def test_blocking_user_invalidates_other_workers(user):
+    token = Token.objects.create(user=user)
+    other_worker = TokenCache(max_size=10, ttl=60, check_interval=0)
+    other_worker.put(token.key, user, token, other_worker.stamp())
+
+    user.is_active = False
+    user.save()
+
+    assert other_worker.get(token.key, other_worker.stamp()) is None
+
+
+def test_other_worker_keeps_generation_until_interval(user, monkeypatch):
+    token = Token.objects.create(user=user)
+    key = token.key
+    other_worker = TokenCache(max_size=10, ttl=60, check_interval=60)
+    other_worker.put(key, user, token, other_worker.stamp())
+
+    token.delete()
+
+    assert other_worker.get(key, other_worker.stamp()) is not None
+    monkeypatch.setattr(other_worker.generation, "check_interval", 0)
+    assert other_worker.get(key, other_worker.stamp()) is None
@@ -0,0 +1,72 @@
+import pytest
+from api.catalog_cache import CatalogCache, matches_etag, tags_cache
+from recipes.models import Tag
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    (
+        ('"tags-12"', True),
+        ('W/"tags-12"', True),
+        ('"other", "tags-12"', True),
+        ("*", True),
+        ('"tags-1"', False),
+        ('"tags-123"', False),
+        ('"x-"tags-12""', False),
+        ("", False),
+    ),
+)
+def test_matches_etag(if_none_match, matches):
+    assert matches_etag('"tags-12"', if_none_match) is matches
+
+
+def test_tags_etag(anonymous_client, tags):
+    response = anonymous_client.get("/api/tags/")
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    response = anonymous_client.get(
+        "/api/tags/", HTTP_IF_NONE_MATCH=f'"stale", {etag}'
+    )
+    assert response.status_code == 304
+
+    response = anonymous_client.get(
+        "/api/tags/", HTTP_IF_NONE_MATCH=etag[:-2] + '"'
+    )
+    assert response.status_code == 200
+
+
+def test_generation_is_shared(anonymous_client, tags):
+    """Другой воркер с пустой памятью видит ту же версию
+    и новую версию после изменения справочника."""
+    other_worker = CatalogCache("tags", check_interval=0)
+    generation = tags_cache.get_generation()
+    assert other_worker.get_generation() == generation
+
+    Tag.objects.create(name="Ужин", color="#8775D2", slug="dinner")
+
+    assert other_worker.get_generation() != generation
+    assert other_worker.get_generation() == tags_cache.get_generation()
+
+
+def test_warm_hit_makes_no_queries(
+    anonymous_client, tags, django_assert_num_queries
+):
+    etag = anonymous_client.get("/api/tags/")["ETag"]
+
+    with django_assert_num_queries(0):
+        assert anonymous_client.get("/api/tags/").status_code == 200
+        assert anonymous_client.get(
+            "/api/tags/", HTTP_IF_NONE_MATCH=etag
+        ).status_code == 304
+
+
+def test_other_worker_sees_bump_after_interval(tags, monkeypatch):
+    other_worker = CatalogCache("tags", check_interval=60)
+    generation = other_worker.get_generation()
+
+    tags_cache.bump()
+
+    assert other_worker.get_generation() == generation
+    monkeypatch.setattr(other_worker.generation, "check_interval", 0)
+    assert other_worker.get_generation() == tags_cache.get_generation()
@@ -0,0 +1,75 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+
+import pytest
+from api.management.commands.benchmark_concurrency import fetch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from users.models import User
+
+
+def test_benchmark_api_without_catalog(user):
+    with pytest.raises(CommandError, match="seed_data"):
+        call_command("benchmark_api", requests=2)
+
+
+def test_seed_data_after_deleting_users(db, tmp_path, settings):
+    """Повторный запуск после удаления части seed-пользователей
+    продолжает нумерацию после наибольшего номера."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    ingredients = tmp_path / "ingredients.csv"
+    ingredients.write_text("соль,г\nсахар,г\nмука,г\n", encoding="utf-8")
+    options = {
+        "users": 5,
+        "recipes": 5,
+        "min_ingredients": 1,
+        "max_ingredients": 2,
+        "ingredients_file": str(ingredients),
+        "stdout": StringIO(),
+    }
+    call_command("seed_data", **options)
+    User.objects.filter(username__in=("seed0", "seed1")).delete()
+
+    call_command("seed_data", **options)
+
+    assert User.objects.filter(username__startswith="seed").count() == 8
+    assert User.objects.filter(username="seed9").exists()
+
+
+class BrokenHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b"partial")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_benchmark_fetch_reports_failures():
+    server = HTTPServer(("127.0.0.1", 0), BrokenHandler)
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        assert fetch(f"{url}/missing", {})[1] == 404
+    finally:
+        thread.join()
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+    try:
+        assert fetch(f"{url}/partial", {})[1] is None
+    finally:
+        thread.join()
+        server.server_close()
+
+    with socket.socket() as free:
+        free.bind(("127.0.0.1", 0))
+        port = free.getsockname()[1]
+    assert fetch(f"http://127.0.0.1:{port}/", {})[1] is None
@@ -0,0 +1,89 @@
+import pytest
+from django.db.models import F
+from recipes.models import Recipes
+from users.models import User
+
+
+def test_user_save_keeps_counters(user, author_client, author):
+    """Смена пароля и /users/me сохраняют загруженного ранее
+    пользователя, но не затирают счетчики, измененные через F()."""
+    stale = User.objects.get(pk=user.pk)
+    response = author_client.post(f"/api/users/{user.pk}/subscribe/")
+    assert response.status_code == 201
+    User.objects.filter(pk=user.pk).update(
+        recipes_count=F("recipes_count") + 2
+    )
+
+    stale.set_password("Another-pass2")
+    stale.save()
+
+    user.refresh_from_db()
+    assert user.subscribers_count == 1
+    assert user.recipes_count == 2
+    assert user.check_password("Another-pass2")
+
+
+def test_set_password_keeps_counters(user, user_client):
+    User.objects.filter(pk=user.pk).update(subscribers_count=5)
+
+    response = user_client.post(
+        "/api/users/set_password/",
+        {"current_password": "Secret-pass1", "new_password": "Another-pass2"},
+    )
+
+    assert response.status_code == 204
+    user.refresh_from_db()
+    assert user.subscribers_count == 5
+    assert user.check_password("Another-pass2")
+
+
+def test_recipe_save_keeps_counters(make_recipe, user_client):
+    recipe = make_recipe(1)
+    stale = Recipes.objects.get(pk=recipe.pk)
+    response = user_client.post(f"/api/recipes/{recipe.pk}/favorite/")
+    assert response.status_code == 200
+
+    stale.name = "Щи"
+    stale.save()
+
+    recipe.refresh_from_db()
+    assert recipe.name == "Щи"
+    assert recipe.favorites_count == 1
+    assert recipe.tags_mask != 0
+
+
+@pytest.mark.parametrize(
+    "url, counter", (
+        ("favorite", "favorites_count"),
+        ("shopping_cart", "in_carts_count"),
+    ),
+)
+def test_repeated_toggle_keeps_counter(make_recipe, user_client, url, counter):
+    """Повторное добавление (ON CONFLICT DO NOTHING) и повторное
+    удаление (пустой DELETE ... RETURNING) не меняют счетчик."""
+    recipe = make_recipe(1)
+    path = f"/api/recipes/{recipe.pk}/{url}/"
+
+    assert user_client.post(path).status_code == 200
+    assert user_client.post(path).status_code == 400
+    recipe.refresh_from_db()
+    assert getattr(recipe, counter) == 1
+
+    assert user_client.delete(path).status_code == 204
+    assert user_client.delete(path).status_code == 400
+    recipe.refresh_from_db()
+    assert getattr(recipe, counter) == 0
+
+
+def test_repeated_subscribe_keeps_counter(user_client, author):
+    path = f"/api/users/{author.pk}/subscribe/"
+
+    assert user_client.post(path).status_code == 201
+    assert user_client.post(path).status_code == 400
+    author.refresh_from_db()
+    assert author.subscribers_count == 1
+
+    assert user_client.delete(path).status_code == 204
+    assert user_client.delete(path).status_code == 400
+    author.refresh_from_db()
+    assert author.subscribers_count == 0
@@ -0,0 +1,117 @@
+from api.feed import fan_out_recipe
+from recipes.models import Recipes, Timeline
+from users.models import User
+
+
+def timeline(user):
+    return set(
+        Timeline.objects.filter(user=user).values_list("recipe", flat=True)
+    )
+
+
+def feed_ids(client, url="/api/recipes/feed/?limit=2"):
+    """Идет по курсорам ленты, возвращает id всех страниц по порядку."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(recipe["id"] for recipe in response.data["results"])
+        url = response.data["next"]
+    return ids
+
+
+def test_subscribe_fills_timeline_on_commit(
+    user, user_client, author, make_recipe,
+    django_capture_on_commit_callbacks,
+):
+    recipes = [make_recipe(number) for number in range(2)]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = user_client.post(f"/api/users/{author.pk}/subscribe/")
+        assert response.status_code == 201
+        assert timeline(user) == set()
+    for callback in callbacks:
+        callback()
+
+    assert timeline(user) == {recipe.pk for recipe in recipes}
+
+
+def test_new_recipe_fans_out_on_commit(
+    user, user_client, author, make_recipe,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/api/users/{author.pk}/subscribe/")
+    author.refresh_from_db()
+    recipe = make_recipe(1)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        fan_out_recipe(recipe)
+    assert timeline(user) == set()
+    for callback in callbacks:
+        callback()
+
+    assert timeline(user) == {recipe.pk}
+
+
+def test_unsubscribe_clears_timeline(
+    user, user_client, author, make_recipe,
+    django_capture_on_commit_callbacks,
+):
+    make_recipe(1)
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/api/users/{author.pk}/subscribe/")
+    assert timeline(user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.delete(f"/api/users/{author.pk}/subscribe/")
+
+    assert response.status_code == 204
+    assert timeline(user) == set()
+    assert feed_ids(user_client) == []
+
+
+def test_popular_author_is_read_on_request(
+    user, user_client, author, make_recipe, monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    """Автор с числом подписчиков больше FEED_FANOUT_LIMIT
+    переводится на чтение при запросе: лента пуста, но рецепты видны."""
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/api/users/{author.pk}/subscribe/")
+    author.refresh_from_db()
+    monkeypatch.setattr("api.feed.FEED_FANOUT_LIMIT", 0)
+    recipe = make_recipe(1)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        fan_out_recipe(recipe)
+
+    assert not User.objects.get(pk=author.pk).feed_fanout
+    assert timeline(user) == set()
+    assert feed_ids(user_client) == [recipe.pk]
+
+
+def test_feed_cursor_pages(
+    user_client, author, make_recipe, django_capture_on_commit_callbacks,
+):
+    """Лента из рассылки и из чтения при запросе листается курсором
+    без потерь и повторов."""
+    pulled = User.objects.create_user(
+        username="chef", email="chef@example.org", password="Secret-pass1",
+        feed_fanout=False,
+    )
+    recipes = [make_recipe(number) for number in range(8)]
+    Recipes.objects.filter(
+        pk__in=[recipe.pk for recipe in recipes[5:]]
+    ).update(author=pulled)
+    with django_capture_on_commit_callbacks(execute=True):
+        for followed in (author, pulled):
+            response = user_client.post(
+                f"/api/users/{followed.pk}/subscribe/"
+            )
+            assert response.status_code == 201
+    Recipes.objects.update(pub_date=recipes[0].pub_date)
+
+    assert feed_ids(user_client) == sorted(
+        (recipe.pk for recipe in recipes), reverse=True
+    )
@@ -0,0 +1,29 @@
+from api.ingredient_index import IngredientIndex
+from django.core.management import call_command
+from recipes.models import Ingredient
+
+
+def test_load_ingredients_refreshes_other_workers(db, tmp_path):
+    """Индекс другого воркера видит ингредиенты, добавленные COPY
+    в обход сигналов, по новой версии справочника в общем кэше."""
+    other_worker = IngredientIndex()
+    assert other_worker.search("соль", 10) == []
+    path = tmp_path / "ingredients.csv"
+    path.write_text("соль,г\nсоль,г\nсахар,г\n", encoding="utf-8")
+
+    call_command("load_ingredients", str(path))
+
+    assert Ingredient.objects.count() == 2
+    assert [row["name"] for row in other_worker.search("соль", 10)] == [
+        "соль"
+    ]
+
+
+def test_warm_search_makes_no_queries(ingredients, django_assert_num_queries):
+    """Поиск по прогретому индексу не ходит ни в базу, ни в кэш."""
+    index = IngredientIndex()
+    index.search("Ингредиент", 10)
+
+    with django_assert_num_queries(0):
+        for query in ("И", "Ингредиент 1", "нгр", "3"):
+            assert index.search(query, 10)
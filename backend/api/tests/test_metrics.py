@@ -0,0 +1,70 @@
+from api.metrics import registry
+from django.test import Client
+
+METRIC = "foodgram_serialization_duration_seconds"
+
+
+def observations(name, **labels):
+    key = tuple(sorted(labels.items()))
+    values = registry.samples[name].get(key)
+    return 0 if values is None else values[-1]
+
+
+def test_metrics_requires_token_or_staff(user, monkeypatch):
+    client = Client()
+    assert client.get("/metrics").status_code == 403
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer "
+    ).status_code == 403
+
+    monkeypatch.setattr("api.metrics.METRICS_TOKEN", "scrape-secret")
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer wrong"
+    ).status_code == 403
+    response = client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret"
+    )
+    assert response.status_code == 200
+    assert f"# TYPE {METRIC} histogram" in response.content.decode()
+
+    client.force_login(user)
+    assert client.get("/metrics").status_code == 403
+    user.is_staff = True
+    user.save()
+    assert client.get("/metrics").status_code == 200
+
+
+def test_serialization_is_timed_once_per_request(
+    make_recipe, anonymous_client
+):
+    make_recipe(1)
+    before = {
+        view: observations(METRIC, view=view)
+        for view in ("recipes-list", "recipes-detail")
+    }
+
+    anonymous_client.get("/api/recipes/")
+    recipe = anonymous_client.get("/api/recipes/").data["results"][0]
+    anonymous_client.get(f"/api/recipes/{recipe['id']}/")
+
+    assert observations(METRIC, view="recipes-list") == (
+        before["recipes-list"] + 2
+    )
+    assert observations(METRIC, view="recipes-detail") == (
+        before["recipes-detail"] + 1
+    )
+
+
+def test_serializers_built_in_views_are_timed(user_client, author):
+    before = {
+        view: observations(METRIC, view=view)
+        for view in ("users-me", "users-subscribe")
+    }
+
+    assert user_client.get("/api/users/me/").status_code == 200
+    assert user_client.post(
+        f"/api/users/{author.pk}/subscribe/"
+    ).status_code == 201
+
+    for view, count in before.items():
+        assert observations(METRIC, view=view) == count + 1
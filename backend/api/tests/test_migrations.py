@@ -0,0 +1,11 @@
+from django.db.migrations.loader import MigrationLoader
+
+
+def test_counters_filled_before_duplicates_removed():
+    """users 0003 уменьшает subscribers_count, поэтому должна идти
+    после recipes 0010, которая его заполняет."""
+    graph = MigrationLoader(None, ignore_no_migrations=True).graph
+
+    assert ("recipes", "0010_counters") in graph.forwards_plan(
+        ("users", "0003_unique_links")
+    )
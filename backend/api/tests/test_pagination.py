@@ -0,0 +1,81 @@
+import pytest
+from api.filters import RECIPES_ORDERINGS
+from recipes.models import Recipes
+
+
+def walk(client, url, key="next"):
+    """Идет по курсорам, возвращает id всех страниц по порядку."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(recipe["id"] for recipe in response.data["results"])
+        url = response.data[key]
+    return ids
+
+
+def test_cursor_pages_recipes_with_equal_pub_date(
+    anonymous_client, make_recipe
+):
+    """Рецепты с одинаковой датой не теряются и не повторяются."""
+    recipes = [make_recipe(number) for number in range(11)]
+    Recipes.objects.update(pub_date=recipes[0].pub_date)
+    expected = sorted((recipe.pk for recipe in recipes), reverse=True)
+
+    ids = walk(anonymous_client, "/api/recipes/?cursor=&limit=4")
+
+    assert ids == expected
+
+
+@pytest.mark.parametrize(
+    "ordering, field, values",
+    (
+        ("popular", "favorites_count", (0, 1, 1, 0, 2)),
+        ("trending", "trending_score", (0.0, 1.5, 1.5, 0.0, 0.25)),
+    ),
+)
+def test_cursor_pages_orderings_with_ties(
+    anonymous_client, make_recipe, ordering, field, values
+):
+    """Курсор popular и trending хранит все поля порядка вместе с id,
+    поэтому рецепты с равным рейтингом не теряются и не повторяются."""
+    for number in range(13):
+        recipe = make_recipe(number)
+        Recipes.objects.filter(pk=recipe.pk).update(
+            **{field: values[number % len(values)]}
+        )
+    expected = list(
+        Recipes.objects.order_by(*RECIPES_ORDERINGS[ordering])
+        .values_list("id", flat=True)
+    )
+
+    ids = walk(
+        anonymous_client,
+        f"/api/recipes/?ordering={ordering}&cursor=&limit=3",
+    )
+
+    assert ids == expected
+
+
+def test_cursor_previous_link_returns_same_pages(
+    anonymous_client, make_recipe
+):
+    for number in range(9):
+        make_recipe(number)
+    first = anonymous_client.get("/api/recipes/?cursor=&limit=4").data
+    second = anonymous_client.get(first["next"]).data
+    third = anonymous_client.get(second["next"]).data
+    assert third["next"] is None
+
+    back = anonymous_client.get(third["previous"]).data
+
+    assert back["results"] == second["results"]
+    assert anonymous_client.get(back["previous"]).data["results"] == (
+        first["results"]
+    )
+
+
+def test_invalid_cursor_position(anonymous_client, make_recipe):
+    make_recipe(1)
+    response = anonymous_client.get("/api/recipes/?cursor=cD1icm9rZW4%3D")
+    assert response.status_code == 404
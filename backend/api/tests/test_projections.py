@@ -0,0 +1,88 @@
+import pytest
+from api.projections import (
+    project_ingredients,
+    project_recipes,
+    project_tags,
+    recipes_values,
+)
+from api.serializers import (
+    IngredientSerilizer,
+    RecipesSerializer,
+    TagSerializer,
+)
+from api.views import RecipesViewSet
+from django.contrib.auth.models import AnonymousUser
+from recipes.models import Favorite, Ingredient, Recipes, ShoppingCart, Tag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.models import Subscribe
+
+renderer = JSONRenderer()
+
+
+def make_request(user):
+    request = Request(APIRequestFactory().get("/api/recipes/"))
+    request.user = user
+    return request
+
+
+@pytest.fixture
+def recipes(make_recipe, user, author):
+    """Рецепты с картинкой, без картинки и с уменьшенными копиями;
+    user подписан на автора, один рецепт у него в избранном,
+    другой в корзине."""
+    recipes = [make_recipe(number, count=number) for number in range(4)]
+    Recipes.objects.filter(pk=recipes[1].pk).update(image="")
+    Recipes.objects.filter(pk=recipes[2].pk).update(
+        image_variants={
+            "thumbnail": {
+                "webp": "recipes/variants/1/thumbnail.webp",
+                "jpeg": "recipes/variants/1/thumbnail.jpeg",
+            },
+        }
+    )
+    Favorite.objects.create(user=user, recipe=recipes[0])
+    ShoppingCart.objects.create(user=user, recipe=recipes[2])
+    Subscribe.objects.create(user=user, author=author)
+    return recipes
+
+
+@pytest.mark.parametrize("authenticated", (False, True))
+def test_project_recipes_matches_serializer(recipes, user, authenticated):
+    request = make_request(user if authenticated else AnonymousUser())
+    view = RecipesViewSet(
+        request=request, format_kwarg=None, kwargs={}, action="list"
+    )
+
+    serialized = RecipesSerializer(
+        view.get_queryset(), many=True, context={"request": request}
+    ).data
+    projected = project_recipes(
+        recipes_values(view.annotate_user_flags(Recipes.objects.all())),
+        request,
+    )
+
+    assert renderer.render(projected) == renderer.render(serialized)
+    by_id = {recipe["id"]: recipe for recipe in projected}
+    assert by_id[recipes[1].pk]["image"] is None
+    assert by_id[recipes[2].pk]["image_variants"]["thumbnail"]["webp"]
+    assert by_id[recipes[0].pk]["is_favorited"] is authenticated
+    assert by_id[recipes[2].pk]["is_in_shopping_cart"] is authenticated
+    assert by_id[recipes[3].pk]["author"]["is_subscribed"] is authenticated
+
+
+def test_project_tags_matches_serializer(tags):
+    serialized = TagSerializer(Tag.objects.all(), many=True).data
+
+    assert renderer.render(project_tags(Tag.objects.all())) == (
+        renderer.render(serialized)
+    )
+
+
+def test_project_ingredients_matches_serializer(ingredients):
+    serialized = IngredientSerilizer(Ingredient.objects.all(), many=True).data
+
+    assert renderer.render(project_ingredients(Ingredient.objects.all())) == (
+        renderer.render(serialized)
+    )
@@ -0,0 +1,247 @@
+import base64
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.admin import site
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from recipes.admin import RecipesAdmin
+from recipes.images import (
+    IMAGE_FORMATS,
+    IMAGE_VARIANTS,
+    VARIANTS_PATH,
+    variants_version,
+)
+from recipes.models import AmountIngredient, Recipes
+
+AMOUNTS_TABLE = AmountIngredient._meta.db_table
+
+
+@pytest.fixture
+def image():
+    buffer = BytesIO()
+    Image.new("RGB", (2, 2), "#E26C2D").save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def recipe_data(tags, ingredients, image, amount=5, **fields):
+    return {
+        "name": "Суп",
+        "text": "Варить",
+        "cooking_time": 30,
+        "image": image,
+        "tags": [tag.pk for tag in tags],
+        "ingredients": [
+            {"id": ingredient.pk, "amount": amount}
+            for ingredient in ingredients
+        ],
+        **fields,
+    }
+
+
+def amount_writes(context):
+    """Запросы INSERT, UPDATE и DELETE к количествам ингредиентов."""
+    return [
+        query["sql"].split()[0]
+        for query in context.captured_queries
+        if f'"{AMOUNTS_TABLE}"' in query["sql"]
+        and query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
+def create_recipe(client, data):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post("/api/recipes/", data, format="json")
+    assert response.status_code == 201, response.data
+    return response.data["id"], context
+
+
+def update_recipe(client, pk, data):
+    data = dict(data)
+    data.pop("image", None)
+    with CaptureQueriesContext(connection) as context:
+        response = client.patch(f"/api/recipes/{pk}/", data, format="json")
+    assert response.status_code == 200, response.data
+    return context
+
+
+def test_create_query_count_does_not_depend_on_ingredients(
+    author_client, tags, ingredients, image
+):
+    """Рецепт с 30 ингредиентами пишется теми же запросами, что с 3."""
+    _, small = create_recipe(
+        author_client, recipe_data(tags, ingredients[:3], image)
+    )
+    pk, large = create_recipe(
+        author_client,
+        recipe_data(tags, ingredients[:30], image, name="Борщ"),
+    )
+
+    assert len(large.captured_queries) == len(small.captured_queries)
+    assert len(large.captured_queries) <= 20
+    assert amount_writes(large) == ["INSERT"]
+    assert AmountIngredient.objects.filter(recipe=pk).count() == 30
+
+
+def test_update_without_ingredient_changes_skips_amounts(
+    author_client, tags, ingredients, image
+):
+    data = recipe_data(tags, ingredients[:30], image)
+    pk, _ = create_recipe(author_client, data)
+
+    context = update_recipe(author_client, pk, {**data, "name": "Щи"})
+
+    assert amount_writes(context) == []
+    assert len(context.captured_queries) <= 13
+
+
+def test_update_writes_only_changed_amounts(
+    author_client, tags, ingredients, image
+):
+    data = recipe_data(tags, ingredients[:30], image)
+    pk, _ = create_recipe(author_client, data)
+    data["ingredients"] = [
+        {"id": ingredients[0].pk, "amount": 7},
+        *data["ingredients"][1:29],
+        {"id": ingredients[30].pk, "amount": 3},
+    ]
+
+    context = update_recipe(author_client, pk, data)
+
+    assert sorted(amount_writes(context)) == ["DELETE", "INSERT", "UPDATE"]
+    assert len(context.captured_queries) <= 18
+    amounts = dict(
+        AmountIngredient.objects.filter(recipe=pk).values_list(
+            "ingredient", "amount"
+        )
+    )
+    assert len(amounts) == 30
+    assert amounts[ingredients[0].pk] == 7
+    assert ingredients[29].pk not in amounts
+    assert amounts[ingredients[30].pk] == 3
+
+
+@pytest.fixture
+def variant_paths(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    def variant_paths(pk):
+        """Создает файлы копий картинки рецепта и возвращает их пути."""
+        paths = {
+            variant: {
+                extension: default_storage.save(
+                    VARIANTS_PATH.format(
+                        pk=pk, version=variants_version("recipes/test.png"),
+                        variant=variant, extension=extension,
+                    ),
+                    ContentFile(b"variant"),
+                )
+                for extension in IMAGE_FORMATS
+            }
+            for variant in IMAGE_VARIANTS
+        }
+        Recipes.objects.filter(pk=pk).update(image_variants=paths)
+        return paths
+
+    return variant_paths
+
+
+def test_update_does_not_overwrite_image_variants(
+    author_client, make_recipe, variant_paths
+):
+    """Правка без картинки не пишет image_variants, которые
+    заполняет фоновый поток."""
+    recipe = make_recipe(1)
+    paths = variant_paths(recipe.pk)
+
+    context = update_recipe(
+        author_client, recipe.pk, {"name": "Щи"}
+    )
+
+    updates = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith(f'UPDATE "{Recipes._meta.db_table}"')
+    ]
+    assert updates
+    assert not any('"image_variants"' in sql for sql in updates)
+    recipe.refresh_from_db()
+    assert recipe.name == "Щи"
+    assert recipe.image_variants == paths
+
+
+def test_image_change_removes_old_variants(
+    author_client, make_recipe, variant_paths, image,
+    django_capture_on_commit_callbacks,
+):
+    recipe = make_recipe(1)
+    paths = variant_paths(recipe.pk)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = author_client.patch(
+            f"/api/recipes/{recipe.pk}/", {"image": image}, format="json"
+        )
+    assert response.status_code == 200, response.data
+    callbacks[0]()
+
+    recipe.refresh_from_db()
+    assert recipe.image_variants == {}
+    for formats in paths.values():
+        for path in formats.values():
+            assert not default_storage.exists(path)
+
+    assert variants_version(recipe.image.name) != (
+        variants_version("recipes/test.png")
+    )
+
+
+def test_admin_image_change_reschedules_variants(
+    rf, make_recipe, variant_paths, django_capture_on_commit_callbacks,
+    monkeypatch,
+):
+    """Новая картинка из админки сбрасывает копии, хотя полное
+    сохранение не пишет image_variants."""
+    recipe = make_recipe(1)
+    paths = variant_paths(recipe.pk)
+    recipe.refresh_from_db()
+    scheduled = []
+    monkeypatch.setattr(
+        "recipes.images.executor.submit",
+        lambda function, pk: scheduled.append(pk),
+    )
+    form = SimpleNamespace(changed_data=["image"])
+    recipe.image = "recipes/other.png"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        RecipesAdmin(Recipes, site).save_model(
+            rf.post("/admin/"), recipe, form, change=True
+        )
+
+    assert scheduled == [recipe.pk]
+    recipe.refresh_from_db()
+    assert recipe.image.name == "recipes/other.png"
+    assert recipe.image_variants == {}
+    for formats in paths.values():
+        for path in formats.values():
+            assert not default_storage.exists(path)
+
+
+def test_delete_removes_variants(
+    author_client, make_recipe, variant_paths,
+    django_capture_on_commit_callbacks,
+):
+    recipe = make_recipe(1)
+    paths = variant_paths(recipe.pk)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.delete(f"/api/recipes/{recipe.pk}/")
+
+    assert response.status_code == 204
+    for formats in paths.values():
+        for path in formats.values():
+            assert not default_storage.exists(path)
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+from api.db_router import use_replica
+from api.middleware import PRIMARY_READS_COOKIE, ReplicaRoutingMiddleware
+from django.http import HttpResponse
+from django.urls import resolve
+from foodgram.settings import REPLICA_STICKY_SECONDS
+
+middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+
+def reads_replica(rf, cookie=None):
+    """Разрешит ли middleware чтение списка рецептов из реплики."""
+    request = rf.get("/api/recipes/")
+    if cookie is not None:
+        request.COOKIES[PRIMARY_READS_COOKIE] = cookie
+    request.resolver_match = resolve("/api/recipes/")
+    token = use_replica.set(False)
+    try:
+        middleware.process_view(request, None, (), {})
+        return use_replica.get()
+    finally:
+        use_replica.reset(token)
+
+
+@pytest.fixture
+def cookie(rf):
+    response = middleware(rf.post("/api/recipes/"))
+    morsel = response.cookies[PRIMARY_READS_COOKIE]
+    assert morsel["max-age"] == REPLICA_STICKY_SECONDS
+    assert morsel["httponly"]
+    return morsel.value
+
+
+def test_reads_replica_without_writes(rf):
+    assert reads_replica(rf) is True
+    assert PRIMARY_READS_COOKIE not in middleware(rf.get("/")).cookies
+
+
+def test_write_pins_reads_to_primary(rf, cookie):
+    assert reads_replica(rf, cookie) is False
+
+
+def test_forged_cookie_is_ignored(rf):
+    assert reads_replica(rf, "1") is True
+
+
+def test_cookie_expires(rf, cookie, monkeypatch):
+    later = time.time() + REPLICA_STICKY_SECONDS + 1
+    monkeypatch.setattr("django.core.signing.time.time", lambda: later)
+    assert reads_replica(rf, cookie) is True
@@ -0,0 +1,49 @@
+from recipes.models import Recipes
+
+
+def search(client, value):
+    response = client.get("/api/recipes/", {"search": value})
+    assert response.status_code == 200
+    return [recipe["id"] for recipe in response.data["results"]]
+
+
+def rename(recipe, name, text="Описание"):
+    """Сохраняет рецепт как админка: вектор пересчитывает post_save."""
+    recipe.name = name
+    recipe.text = text
+    recipe.save()
+    return recipe
+
+
+def test_name_match_ranks_above_text_match(anonymous_client, make_recipe):
+    """Совпадение в названии (вес A) выше совпадения в описании (вес B),
+    хотя рецепт с названием старше."""
+    in_name = rename(make_recipe(0), "Борщ украинский")
+    in_text = rename(make_recipe(1), "Суп", "Подавать как борщ")
+    rename(make_recipe(2), "Окрошка")
+
+    assert search(anonymous_client, "борщ") == [in_name.pk, in_text.pk]
+
+
+def test_typo_matches_by_trigram(anonymous_client, make_recipe):
+    """Запрос с пропущенной буквой не совпадает с вектором,
+    но находится по триграммному сходству названия."""
+    recipe = rename(make_recipe(0), "Солянка")
+    rename(make_recipe(1), "Окрошка")
+
+    assert search(anonymous_client, "олянка") == [recipe.pk]
+
+
+def test_search_vector_follows_edit(
+    anonymous_client, author_client, make_recipe
+):
+    recipe = make_recipe(0)
+    assert search(anonymous_client, "окрошка") == []
+
+    response = author_client.patch(
+        f"/api/recipes/{recipe.pk}/", {"name": "Окрошка"}, format="json"
+    )
+    assert response.status_code == 200, response.data
+
+    assert search(anonymous_client, "окрошка") == [recipe.pk]
+    assert Recipes.objects.get(pk=recipe.pk).search_vector
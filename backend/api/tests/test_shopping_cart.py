@@ -0,0 +1,120 @@
+import pytest
+from api.shopping_list import diff_shopping_lists
+from recipes.models import AmountIngredient, Recipes, ShoppingListItem
+
+
+def fill_cart(client, recipes):
+    for recipe in recipes:
+        response = client.post(f"/api/recipes/{recipe.pk}/shopping_cart/")
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize("cart_size", (1, 10, 50))
+def test_download_query_count_does_not_grow(
+    user_client, make_recipe, django_assert_num_queries, cart_size
+):
+    """Список покупок читается одним запросом при любом размере корзины."""
+    fill_cart(
+        user_client,
+        [make_recipe(number, count=5) for number in range(cart_size)],
+    )
+    with django_assert_num_queries(1):
+        response = user_client.get("/api/recipes/download_shopping_cart/")
+        body = b"".join(response.streaming_content).decode()
+    assert response.status_code == 200
+    rows = body.strip().splitlines()
+    assert len(rows) == 6
+    expected = sum(number + 1 for number in range(cart_size))
+    assert rows[1].split(",")[1] == str(expected)
+
+
+def test_download_empty_cart(user_client, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        response = user_client.get("/api/recipes/download_shopping_cart/")
+    assert response.status_code == 204
+
+
+def shopping_list(user):
+    """Список покупок пользователя: {id ингредиента: количество}."""
+    return dict(
+        ShoppingListItem.objects.filter(user=user).values_list(
+            "ingredient", "amount"
+        )
+    )
+
+
+def test_list_follows_cart_and_amount_changes(
+    user, user_client, make_recipe, ingredients
+):
+    first, second = make_recipe(0), make_recipe(1)
+    fill_cart(user_client, (first, second))
+    assert shopping_list(user) == {
+        ingredient.pk: 3 for ingredient in ingredients[:3]
+    }
+
+    amount = AmountIngredient.objects.get(
+        recipe=first, ingredient=ingredients[0]
+    )
+    amount.amount = 5
+    amount.save()
+    AmountIngredient.objects.filter(
+        recipe=second, ingredient=ingredients[1]
+    ).delete()
+    AmountIngredient.objects.create(
+        recipe=second, ingredient=ingredients[5], amount=4
+    )
+
+    assert shopping_list(user) == {
+        ingredients[0].pk: 7,
+        ingredients[1].pk: 1,
+        ingredients[2].pk: 3,
+        ingredients[5].pk: 4,
+    }
+    assert diff_shopping_lists() == []
+
+
+def test_admin_recipe_delete_updates_list(
+    user, user_client, make_recipe, ingredients
+):
+    """Удаление рецепта в обход API (как в админке) убирает
+    его ингредиенты из списков покупок."""
+    recipe, kept = make_recipe(0), make_recipe(1, count=1)
+    fill_cart(user_client, (recipe, kept))
+
+    Recipes.objects.get(pk=recipe.pk).delete()
+
+    assert shopping_list(user) == {ingredients[0].pk: 2}
+    response = user_client.get("/api/recipes/download_shopping_cart/")
+    rows = b"".join(response.streaming_content).decode().splitlines()
+    assert len(rows) == 2
+    assert diff_shopping_lists() == []
+
+
+def test_author_delete_updates_list(
+    user, user_client, author, make_recipe
+):
+    fill_cart(user_client, (make_recipe(0), make_recipe(1)))
+
+    author.delete()
+
+    assert shopping_list(user) == {}
+    response = user_client.get("/api/recipes/download_shopping_cart/")
+    assert response.status_code == 204
+
+
+def test_batch_toggle_updates_list(user, user_client, make_recipe):
+    recipes = [make_recipe(number) for number in range(3)]
+    ids = [recipe.pk for recipe in recipes]
+
+    response = user_client.post(
+        "/api/recipes/shopping_cart/", {"recipes": ids}, format="json"
+    )
+    assert response.status_code == 200
+    assert set(shopping_list(user).values()) == {6}
+
+    response = user_client.delete(
+        "/api/recipes/shopping_cart/", {"recipes": ids[1:]}, format="json"
+    )
+    assert response.status_code == 200
+    assert set(shopping_list(user).values()) == {1}
+    assert diff_shopping_lists() == []
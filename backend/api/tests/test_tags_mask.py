@@ -0,0 +1,69 @@
+import pytest
+from recipes.models import Recipes, Tag
+
+
+def stored_mask(recipe):
+    return Recipes.objects.values_list("tags_mask", flat=True).get(
+        pk=recipe.pk
+    )
+
+
+def expected_mask(recipe):
+    mask = 0
+    for tag in Tag.objects.filter(tags=recipe):
+        mask |= tag.mask
+    return mask
+
+
+@pytest.fixture
+def dinner(db):
+    return Tag.objects.create(name="Ужин", color="#8775D2", slug="dinner")
+
+
+def test_mask_follows_set_and_remove(make_recipe, tags, dinner):
+    recipe = make_recipe(1)
+    assert stored_mask(recipe) == tags[0].mask | tags[1].mask
+
+    recipe.tags.set((tags[1], dinner))
+    assert stored_mask(recipe) == tags[1].mask | dinner.mask
+
+    recipe.tags.remove(tags[1])
+    assert stored_mask(recipe) == dinner.mask
+
+    dinner.tags.add(make_recipe(0))
+    assert stored_mask(recipe) == expected_mask(recipe)
+
+
+def test_tag_delete_clears_bit(make_recipe, tags):
+    recipes = [make_recipe(number) for number in range(2)]
+
+    tags[0].delete()
+
+    for recipe in recipes:
+        assert stored_mask(recipe) == expected_mask(recipe)
+    assert stored_mask(recipes[0]) == 0
+    assert stored_mask(recipes[1]) == tags[1].mask
+
+
+def test_tags_filter_keeps_or_semantics(
+    anonymous_client, make_recipe, tags, dinner
+):
+    """?tags=a&tags=b возвращает те же рецепты, что и прежний
+    фильтр tags__slug__in."""
+    recipes = [make_recipe(number) for number in range(4)]
+    recipes[2].tags.set((tags[1],))
+    recipes[3].tags.set((dinner,))
+    make_recipe(4).tags.clear()
+
+    for slugs in (
+        ("breakfast",), ("lunch",), ("lunch", "dinner"),
+        ("breakfast", "lunch", "dinner"),
+    ):
+        response = anonymous_client.get(
+            "/api/recipes/", {"tags": slugs, "limit": 10}
+        )
+        assert response.status_code == 200
+        assert [recipe["id"] for recipe in response.data["results"]] == list(
+            Recipes.objects.filter(tags__slug__in=slugs).distinct()
+            .values_list("id", flat=True)
+        )
@@ -0,0 +1,97 @@
+import pytest
+from foodgram.settings import RECIPES_BATCH_LIMIT
+from recipes.models import Favorite, Recipes, ShoppingCart
+
+BATCHES = (
+    ("favorite", Favorite, "favorites_count"),
+    ("shopping_cart", ShoppingCart, "in_carts_count"),
+)
+
+
+def toggle(client, method, url, ids):
+    response = getattr(client, method)(
+        f"/api/recipes/{url}/", {"recipes": ids}, format="json"
+    )
+    assert response.status_code == 200, response.data
+    return {item["id"]: item["status"] for item in response.data}
+
+
+def counters(recipes, counter):
+    return dict(
+        Recipes.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes]
+        ).values_list("id", counter)
+    )
+
+
+@pytest.mark.parametrize("url, model, counter", BATCHES)
+def test_batch_statuses(user, user_client, make_recipe, url, model, counter):
+    first, second = make_recipe(0), make_recipe(1)
+    missing = second.pk + 100
+    toggle(user_client, "post", url, [first.pk])
+
+    assert toggle(
+        user_client, "post", url, [first.pk, second.pk, missing]
+    ) == {first.pk: "exists", second.pk: "added", missing: "not_found"}
+    assert toggle(user_client, "delete", url, [second.pk, missing]) == {
+        second.pk: "removed", missing: "not_found",
+    }
+    assert toggle(user_client, "delete", url, [second.pk]) == {
+        second.pk: "missing",
+    }
+    assert set(
+        model.objects.filter(user=user).values_list("recipe", flat=True)
+    ) == {first.pk}
+
+
+@pytest.mark.parametrize("url, model, counter", BATCHES)
+def test_batch_deduplicates_ids(
+    user_client, make_recipe, url, model, counter
+):
+    recipe = make_recipe(0)
+
+    response = user_client.post(
+        f"/api/recipes/{url}/",
+        {"recipes": [recipe.pk, recipe.pk, recipe.pk]},
+        format="json",
+    )
+
+    assert response.data == [{"id": recipe.pk, "status": "added"}]
+    assert counters((recipe,), counter) == {recipe.pk: 1}
+
+
+@pytest.mark.parametrize("url, model, counter", BATCHES)
+def test_batch_size_is_limited(
+    user_client, make_recipe, url, model, counter
+):
+    ids = list(range(1, RECIPES_BATCH_LIMIT + 2))
+
+    response = user_client.post(
+        f"/api/recipes/{url}/", {"recipes": ids}, format="json"
+    )
+
+    assert response.status_code == 400
+    assert "recipes" in response.data
+    assert not model.objects.exists()
+
+
+@pytest.mark.parametrize("url, model, counter", BATCHES)
+def test_repeated_batches_keep_counters(
+    user_client, author_client, make_recipe, url, model, counter
+):
+    """Повторные POST и DELETE ничего не меняют, а счетчики
+    равны числу связей."""
+    recipes = [make_recipe(number) for number in range(3)]
+    ids = [recipe.pk for recipe in recipes]
+
+    for _ in range(2):
+        toggle(user_client, "post", url, ids)
+        toggle(author_client, "post", url, ids[:1])
+    assert counters(recipes, counter) == {
+        ids[0]: 2, ids[1]: 1, ids[2]: 1,
+    }
+
+    for _ in range(2):
+        toggle(user_client, "delete", url, ids)
+    assert counters(recipes, counter) == {ids[0]: 1, ids[1]: 0, ids[2]: 0}
+    assert model.objects.count() == 1
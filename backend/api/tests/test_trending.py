@@ -0,0 +1,20 @@
+from api.trending import TRENDING_CACHE_KEY, record_favorites
+from django.core.cache import cache
+from django.core.management import call_command
+
+
+def test_update_trending_fills_shared_top(make_recipe, anonymous_client):
+    """Топ, посчитанный командой, лежит в общем кеше
+    и отдается /api/recipes/trending/ без пересчета."""
+    recipes = [make_recipe(number) for number in range(3)]
+    record_favorites(None, [recipes[1].pk], 1)
+    record_favorites(None, [recipes[1].pk, recipes[2].pk], 1)
+
+    call_command("update_trending")
+
+    assert cache.get(TRENDING_CACHE_KEY) == [recipes[1].pk, recipes[2].pk]
+    response = anonymous_client.get("/api/recipes/trending/")
+    assert response.status_code == 200
+    assert [recipe["id"] for recipe in response.data] == [
+        recipes[1].pk, recipes[2].pk
+    ]
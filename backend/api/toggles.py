@@ -0,0 +1,122 @@
+from django.db import connection
+
+
+def get_columns(link_model, target_field):
+    meta = link_model._meta
+    target = meta.get_field(target_field)
+    return (
+        meta.db_table,
+        meta.get_field("user").column,
+        target.column,
+        target.related_model,
+    )
+
+
+def add_link(link_model, target_field, counter, user_id, target_id, fields):
+    """Одним запросом добавляет связь пользователя с объектом
+    (INSERT ... ON CONFLICT DO NOTHING) и увеличивает счетчик объекта.
+
+    Возвращает объект с полями fields и атрибутом created
+    или None, если объекта нет."""
+    link_table, user_column, target_column, target_model = get_columns(
+        link_model, target_field
+    )
+    target_table = target_model._meta.db_table
+    columns = ", ".join(("id",) + tuple(fields))
+    rows = list(target_model.objects.raw(
+        f"WITH target AS ("
+        f"SELECT {columns} FROM {target_table} WHERE id = %s"
+        f"), inserted AS ("
+        f"INSERT INTO {link_table} ({user_column}, {target_column}) "
+        f"SELECT %s, id FROM target "
+        f"ON CONFLICT ({user_column}, {target_column}) DO NOTHING "
+        f"RETURNING {target_column}"
+        f"), counted AS ("
+        f"UPDATE {target_table} SET {counter} = {counter} + 1 "
+        f"WHERE id IN (SELECT {target_column} FROM inserted)"
+        f") SELECT target.*, EXISTS (SELECT 1 FROM inserted) AS created "
+        f"FROM target",
+        (target_id, user_id),
+    ))
+    return rows[0] if rows else None
+
+
+def remove_link(link_model, target_field, counter, user_id, target_id):
+    """Одним запросом удаляет связь (DELETE ... RETURNING) и уменьшает
+    счетчик объекта. Возвращает количество удаленных связей."""
+    link_table, user_column, target_column, target_model = get_columns(
+        link_model, target_field
+    )
+    target_table = target_model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH deleted AS ("
+            f"DELETE FROM {link_table} "
+            f"WHERE {user_column} = %s AND {target_column} = %s "
+            f"RETURNING {target_column}"
+            f"), counted AS ("
+            f"UPDATE {target_table} SET {counter} = {counter} - 1 "
+            f"WHERE id IN (SELECT {target_column} FROM deleted)"
+            f") SELECT count(*) FROM deleted",
+            (user_id, target_id),
+        )
+        return cursor.fetchone()[0]
+
+
+def add_links(link_model, target_field, counter, user_id, target_ids):
+    """Одним запросом добавляет связи пользователя с несколькими объектами
+    и увеличивает их счетчики.
+
+    Возвращает словарь {id объекта: добавлена ли связь} только для
+    существующих объектов."""
+    link_table, user_column, target_column, target_model = get_columns(
+        link_model, target_field
+    )
+    target_table = target_model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH target AS ("
+            f"SELECT id FROM {target_table} WHERE id = ANY(%s)"
+            f"), inserted AS ("
+            f"INSERT INTO {link_table} ({user_column}, {target_column}) "
+            f"SELECT %s, id FROM target "
+            f"ON CONFLICT ({user_column}, {target_column}) DO NOTHING "
+            f"RETURNING {target_column}"
+            f"), counted AS ("
+            f"UPDATE {target_table} SET {counter} = {counter} + 1 "
+            f"WHERE id IN (SELECT {target_column} FROM inserted)"
+            f") SELECT target.id, inserted.{target_column} IS NOT NULL "
+            f"FROM target LEFT JOIN inserted "
+            f"ON inserted.{target_column} = target.id",
+            (list(target_ids), user_id),
+        )
+        return dict(cursor.fetchall())
+
+
+def remove_links(link_model, target_field, counter, user_id, target_ids):
+    """Одним запросом удаляет связи пользователя с несколькими объектами
+    и уменьшает их счетчики.
+
+    Возвращает словарь {id объекта: удалена ли связь} только для
+    существующих объектов."""
+    link_table, user_column, target_column, target_model = get_columns(
+        link_model, target_field
+    )
+    target_table = target_model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH target AS ("
+            f"SELECT id FROM {target_table} WHERE id = ANY(%s)"
+            f"), deleted AS ("
+            f"DELETE FROM {link_table} "
+            f"WHERE {user_column} = %s AND {target_column} = ANY(%s) "
+            f"RETURNING {target_column}"
+            f"), counted AS ("
+            f"UPDATE {target_table} SET {counter} = {counter} - 1 "
+            f"WHERE id IN (SELECT {target_column} FROM deleted)"
+            f") SELECT target.id, deleted.{target_column} IS NOT NULL "
+            f"FROM target LEFT JOIN deleted "
+            f"ON deleted.{target_column} = target.id",
+            (list(target_ids), user_id, list(target_ids)),
+        )
+        return dict(cursor.fetchall())
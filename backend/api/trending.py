@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from foodgram.settings import (
+    TRENDING_CACHE_SECONDS,
+    TRENDING_HALF_LIFE_DAYS,
+    TRENDING_TOP_SIZE,
+    TRENDING_WINDOW_DAYS,
+)
+from recipes.models import RecipeActivity, Recipes
+
+TRENDING_CACHE_KEY = "recipes-trending-top"
+ACTIVITY_TABLE = RecipeActivity._meta.db_table
+RECIPES_TABLE = Recipes._meta.db_table
+
+
+def record_activity(recipe_ids, favorites=0, carts=0):
+    """Прибавляет изменения к сегодняшним счетчикам рецептов."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ACTIVITY_TABLE} "
+            f"(recipe_id, day, favorites, carts) "
+            f"SELECT recipe_id, CURRENT_DATE, %s, %s "
+            f"FROM unnest(%s::bigint[]) AS recipe_id "
+            f"ON CONFLICT (recipe_id, day) DO UPDATE SET "
+            f"favorites = {ACTIVITY_TABLE}.favorites + EXCLUDED.favorites, "
+            f"carts = {ACTIVITY_TABLE}.carts + EXCLUDED.carts",
+            (favorites, carts, list(recipe_ids)),
+        )
+
+
+def record_favorites(user_id, recipe_ids, sign):
+    record_activity(recipe_ids, favorites=sign)
+
+
+def record_carts(user_id, recipe_ids, sign):
+    record_activity(recipe_ids, carts=sign)
+
+
+@transaction.atomic
+def update_trending_scores():
+    """Пересчитывает затухающий рейтинг по активности за последние
+    TRENDING_WINDOW_DAYS дней и удаляет более старую активность.
+    Возвращает количество рецептов с изменившимся рейтингом."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {ACTIVITY_TABLE} "
+            f"WHERE day <= CURRENT_DATE - %s",
+            (TRENDING_WINDOW_DAYS,),
+        )
+        cursor.execute(
+            f"UPDATE {RECIPES_TABLE} SET trending_score = 0 "
+            f"WHERE trending_score <> 0 AND id NOT IN ("
+            f"SELECT recipe_id FROM {ACTIVITY_TABLE})"
+        )
+        updated = cursor.rowcount
+        cursor.execute(
+            f"UPDATE {RECIPES_TABLE} recipes "
+            f"SET trending_score = scores.score FROM ("
+            f"SELECT recipe_id, SUM((favorites + carts) "
+            f"* power(0.5, (CURRENT_DATE - day) / %s)) AS score "
+            f"FROM {ACTIVITY_TABLE} GROUP BY recipe_id"
+            f") scores WHERE scores.recipe_id = recipes.id "
+            f"AND recipes.trending_score <> scores.score",
+            (TRENDING_HALF_LIFE_DAYS,),
+        )
+        return updated + cursor.rowcount
+
+
+def cache_trending_top():
+    """Сохраняет в общий кеш id рецептов с наибольшим рейтингом:
+    топ, посчитанный командой update_trending, видят все воркеры."""
+    top = list(
+        Recipes.objects.filter(trending_score__gt=0)
+        .order_by("-trending_score", "-id")
+        .values_list("id", flat=True)[:TRENDING_TOP_SIZE]
+    )
+    cache.set(TRENDING_CACHE_KEY, top, TRENDING_CACHE_SECONDS)
+    return top
+
+
+def get_trending_top():
+    """id рецептов из закешированного топа. Если кеш пуст или устарел,
+    топ читается по индексу trending_score, без таблиц активности."""
+    top = cache.get(TRENDING_CACHE_KEY)
+    if top is None:
+        top = cache_trending_top()
+    return top
@@ -1,17 +1,40 @@
 import csv
 
-from api.filters import IngredientsFilter, RecipesFilter
-from api.pagination import PageLimitPagination
+from api.catalog_cache import (
+    CatalogCacheMixin,
+    ingredients_cache,
+    tags_cache,
+)
+from api.feed import (
+    add_author_to_timeline, fan_out_recipe, feed_queryset,
+    remove_author_from_timeline,
+)
+from api.filters import IngredientsFilter, RecipesFilter, RECIPES_ORDERINGS
+from api.ingredient_index import ingredient_index
+from api.metrics import SerializationTimingMixin, TimedSerializer
+from api.pagination import CursorLimitPagination, PageOrCursorPagination
+from api.projections import (
+    project_ingredients, project_recipes, project_tags, recipes_prefetches,
+    recipes_values,
+)
 from api.serializers import (
     CartSerializer,
     CustomUserSerializer,
     IngredientSerilizer,
+    RecipesBatchSerializer,
     RecipesPostUpdateSerializer,
     RecipesSerializer,
     SubscribeSerializer,
     TagSerializer,
 )
-from django.http import HttpResponse
+from api.toggles import add_link, add_links, remove_link, remove_links
+from api.trending import get_trending_top, record_carts, record_favorites
+from django.db import transaction
+from django.db.models import (
+    BooleanField, Exists, F, OuterRef, Value, Window,
+)
+from django.db.models.functions import RowNumber
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -23,23 +46,99 @@ from rest_framework.permissions import (
 from .permissions import IsAuthorOrAdminOrReadOnly
 from rest_framework.response import Response
 from djoser.views import UserViewSet
-from foodgram.settings import SHOPCART_FILENAME
+from foodgram.settings import INGREDIENT_SEARCH_LIMIT, SHOPCART_FILENAME
 from recipes.models import (
-    Favorite, Ingredient, Recipes, ShoppingCart, Tag, AmountIngredient
+    Favorite, Ingredient, Recipes, ShoppingCart, ShoppingListItem, Tag,
 )
 from users.models import Subscribe, User
 
 TEXT_CSV = "text/csv"
+CART_RECIPE_FIELDS = ("name", "image", "cooking_time")
+BATCH_STATUSES = {
+    "POST": ("exists", "added"),
+    "DELETE": ("missing", "removed"),
+}
+"""Статусы пакетной операции: связь не изменилась или изменилась."""
+SUBSCRIBE_AUTHOR_FIELDS = (
+    "email", "username", "first_name", "last_name", "recipes_count",
+)
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
 
+    def write(self, value):
+        return value
+
+
+def shopping_cart_rows(writer, ingredients):
+    """Построчно формирует CSV со списком покупок."""
+    yield writer.writerow(
+        (
+            "Ingredient name",
+            "Ingredient amount",
+            "Measurement unit",
+        )
+    )
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (
+                ingredient["ingredient__name"],
+                ingredient["total_amount"],
+                ingredient["ingredient__measurement_unit"],
+            )
+        )
 
-class UsersViewSet(UserViewSet):
+
+def get_recipes_limit(request):
+    """Возвращает значение параметра recipes_limit или None."""
+    recipes_limit = request.query_params.get("recipes_limit", "")
+    if recipes_limit.isdigit() and int(recipes_limit) > 0:
+        return int(recipes_limit)
+    return None
+
+
+def attach_limited_recipes(authors, recipes_limit=None):
+    """Одним запросом загружает рецепты авторов страницы подписок.
+
+    При заданном recipes_limit для каждого автора остаются только
+    последние recipes_limit рецептов (ROW_NUMBER по автору).
+    Рецепты сохраняются в атрибут limited_recipes автора."""
+    authors = {author.id: author for author in authors}
+    for author in authors.values():
+        author.limited_recipes = []
+    if not authors:
+        return
+    recipes = Recipes.objects.filter(author__in=authors).order_by(
+        "author", "-pub_date", "-id"
+    )
+    if recipes_limit:
+        ranked = recipes.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F("author"),
+                order_by=(F("pub_date").desc(), F("id").desc()),
+            )
+        ).values("id", "author", "name", "image", "cooking_time", "row_number")
+        sql, params = ranked.query.sql_with_params()
+        recipes = Recipes.objects.raw(
+            f"SELECT * FROM ({sql}) ranked WHERE row_number <= %s "
+            "ORDER BY author_id, row_number",
+            (*params, recipes_limit),
+        )
+    for recipe in recipes:
+        authors[recipe.author_id].limited_recipes.append(recipe)
+
+
+class UsersViewSet(SerializationTimingMixin, UserViewSet):
     """Вьюсет для получения информации о пользователях."""
 
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     search_fields = ("username", "email")
     permission_classes = (AllowAny,)
-    pagination_class = PageLimitPagination
+    pagination_class = PageOrCursorPagination
+    cursor_ordering = ("-id",)
 
     def get_queryset(self):
         id = self.kwargs.get("id")
@@ -57,7 +156,7 @@ class UsersViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def my(self, request):
-        serializer = CustomUserSerializer(request.user)
+        serializer = TimedSerializer(CustomUserSerializer(request.user))
         return Response(serializer.data)
 
     @action(
@@ -66,12 +165,16 @@ class UsersViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def subscriptions(self, request):
-        user = self.request.user
-        user_subscriptions = user.subscriber.all()
-        authors = [item.author.id for item in user_subscriptions]
-        queryset = User.objects.filter(pk__in=authors)
-        paginated_queryset = self.paginate_queryset(queryset)
-        serializer = SubscribeSerializer(paginated_queryset, many=True)
+        queryset = User.objects.filter(
+            subscribing__user=self.request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).order_by("username")
+        authors = self.paginate_queryset(queryset)
+        attach_limited_recipes(authors, get_recipes_limit(request))
+        serializer = TimedSerializer(
+            SubscribeSerializer(authors, many=True)
+        )
 
         return self.get_paginated_response(serializer.data)
 
@@ -83,44 +186,60 @@ class UsersViewSet(UserViewSet):
         detail=True,
         permission_classes=(IsAuthenticated,),
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         user = self.request.user
-        author = get_object_or_404(User, id=id)
-        if user == author:
+        if not str(id).isdigit():
+            raise Http404
+        if user.id == int(id):
             return Response(
                 {"error": "Нельзя подписатся на себя"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        subscribers = Subscribe.objects.filter(
-            user=user,
-            author=author
-        )
         if self.request.method == "POST":
-            if subscribers.exists():
+            author = add_link(
+                Subscribe, "author", "subscribers_count", user.id, id,
+                SUBSCRIBE_AUTHOR_FIELDS,
+            )
+            if author is None:
+                raise Http404
+            if not author.created:
                 return Response(
                     {"error": "Уже подписан"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            Subscribe.objects.create(user=request.user, author=author),
-            serializer = SubscribeSerializer(
-                author, context={"request": request})
+            add_author_to_timeline(user.id, id)
+            author.is_subscribed = True
+            serializer = TimedSerializer(SubscribeSerializer(
+                author,
+                context={
+                    "request": request,
+                    "recipes_limit": get_recipes_limit(request),
+                },
+            ))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        if self.request.method == "DELETE":
-            if subscribers.exists():
-                subscribers.delete()
-                return Response(status=status.HTTP_204_NO_CONTENT)
+        if remove_link(Subscribe, "author", "subscribers_count", user.id, id):
+            remove_author_from_timeline(user.id, id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(User, id=id)
         return Response(
             {"error": "Такой подписки нет"}, status=status.HTTP_400_BAD_REQUEST
         )
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(
+    SerializationTimingMixin, CatalogCacheMixin, viewsets.ModelViewSet
+):
     """Вьюсет создания тегов"""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    catalog_cache = tags_cache
+
+    def get_list_data(self, queryset):
+        return project_tags(queryset)
 
     @action(detail=False)
     def get_tag(self, request):
@@ -129,7 +248,9 @@ class TagViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(
+    SerializationTimingMixin, CatalogCacheMixin, viewsets.ModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerilizer
     permission_classes = (AllowAny,)
@@ -137,6 +258,18 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filterset_class = IngredientsFilter
     search_fields = ("name",)
     pagination_class = None
+    catalog_cache = ingredients_cache
+
+    def get_list_data(self, queryset):
+        return project_ingredients(queryset)
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get("name")
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            ingredient_index.search(name, INGREDIENT_SEARCH_LIMIT)
+        )
 
     @action(detail=False)
     def get_ingredients(self, request):
@@ -145,30 +278,115 @@ class IngredientViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(SerializationTimingMixin, viewsets.ModelViewSet):
     """Вьюсет для создания рецептов"""
 
     queryset = Recipes.objects.all()
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
-    pagination_class = PageLimitPagination
+    pagination_class = PageOrCursorPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipesFilter
 
+    @property
+    def cursor_ordering(self):
+        return RECIPES_ORDERINGS.get(
+            self.request.query_params.get("ordering"), ("-pub_date", "-id")
+        )
+
+    def get_queryset(self):
+        return self.annotate_user_flags(
+            Recipes.objects.select_related("author").prefetch_related(
+                *recipes_prefetches()
+            )
+        )
+
+    def annotate_user_flags(self, queryset):
+        """Добавляет is_favorited, is_in_shopping_cart
+        и author_is_subscribed для текущего пользователя."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                author_is_subscribed=Value(False, output_field=BooleanField()),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            author_is_subscribed=Exists(
+                Subscribe.objects.filter(user=user, author=OuterRef("author"))
+            ),
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Список собирается project_recipes из строк .values()
+        без RecipesSerializer; формат ответа тот же."""
+        queryset = self.filter_queryset(
+            self.annotate_user_flags(Recipes.objects.all())
+        )
+        rows = recipes_values(
+            queryset, *(field.lstrip("-") for field in self.cursor_ordering)
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(project_recipes(rows, request))
+        return self.get_paginated_response(project_recipes(page, request))
+
     def get_serializer_class(self):
-        if self.action == SAFE_METHODS:
+        if self.request.method in SAFE_METHODS:
             return RecipesSerializer
         return RecipesPostUpdateSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        User.objects.filter(pk=self.request.user.pk).update(
+            recipes_count=F("recipes_count") + 1
+        )
+        fan_out_recipe(recipe)
 
     def perform_update(self, serializer):
         serializer.save(author=self.request.user, partial=False)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F("recipes_count") - 1
+        )
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=CursorLimitPagination,
+    )
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        queryset = self.filter_queryset(
+            feed_queryset(self.get_queryset(), request.user)
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, pagination_class=None)
+    def trending(self, request):
+        """Закешированный топ рецептов по рейтингу trending."""
+        top = get_trending_top()
+        recipes = self.get_queryset().in_bulk(top)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in top if pk in recipes], many=True
+        )
+        return Response(serializer.data)
+
     @action(detail=False, methods=("get",))
     def get_recipes(self, request):
         recipes = Recipes.objects.all()
-        serializer = RecipesSerializer(recipes, many=True)
+        serializer = TimedSerializer(RecipesSerializer(recipes, many=True))
         return Response(serializer.data)
 
     @action(
@@ -182,7 +400,9 @@ class RecipesViewSet(viewsets.ModelViewSet):
     )
     def post_recipes(self, request):
         print(request.data)
-        serializer = RecipesPostUpdateSerializer(data=request.data)
+        serializer = TimedSerializer(
+            RecipesPostUpdateSerializer(data=request.data)
+        )
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
@@ -196,27 +416,10 @@ class RecipesViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def shopping_cart(self, request, pk=None):
-        user = self.request.user
-        recipe = get_object_or_404(Recipes, pk=pk)
-        cart = ShoppingCart.objects.filter(user=user, recipe=recipe)
-
-        if self.request.method == "POST":
-            if cart.exists():
-                return Response(
-                    {"error": "Рецепт уже в корзине"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            ShoppingCart.objects.create(user=user, recipe=recipe)
-            serializer = CartSerializer(recipe, context={"request": request})
-            return Response(serializer.data)
-
-        if self.request.method == "DELETE":
-            if cart.exists():
-                cart.delete()
-                return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(
-            {"error": "Рецепта нет в корзине"},
-            status=status.HTTP_400_BAD_REQUEST
+        return self.toggle_recipe_link(
+            request, pk, ShoppingCart, "in_carts_count",
+            "Рецепт уже в корзине", "Рецепта нет в корзине",
+            on_change=(record_carts,),
         )
 
     @action(
@@ -228,25 +431,108 @@ class RecipesViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def favorite(self, request, pk=None):
+        return self.toggle_recipe_link(
+            request, pk, Favorite, "favorites_count",
+            "Рецепт уже в избранном", "Рецепта нет в избранном",
+            on_change=(record_favorites,),
+        )
+
+    @action(
+        detail=False,
+        methods=(
+            "post",
+            "delete",
+        ),
+        url_path="shopping_cart",
+        url_name="shopping-cart-batch",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_batch(self, request):
+        return self.toggle_recipe_links(
+            request, ShoppingCart, "in_carts_count",
+            on_change=(record_carts,),
+        )
+
+    @action(
+        detail=False,
+        methods=(
+            "post",
+            "delete",
+        ),
+        url_path="favorite",
+        url_name="favorite-batch",
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_batch(self, request):
+        return self.toggle_recipe_links(
+            request, Favorite, "favorites_count", on_change=(record_favorites,)
+        )
+
+    @transaction.atomic
+    def toggle_recipe_links(self, request, model, counter, on_change=()):
+        """Добавляет или удаляет список рецептов одним SQL-запросом
+        и возвращает статус для каждого id. Функции on_change вызываются
+        в той же транзакции для рецептов, связь с которыми изменилась."""
+        serializer = RecipesBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        toggle = add_links if request.method == "POST" else remove_links
+        changed = toggle(model, "recipe", counter, request.user.id, recipe_ids)
+        statuses = BATCH_STATUSES[request.method]
+        changed_ids = [pk for pk, is_changed in changed.items() if is_changed]
+        if changed_ids:
+            sign = 1 if request.method == "POST" else -1
+            for callback in on_change:
+                callback(request.user.id, changed_ids, sign)
+        return Response(
+            [
+                {
+                    "id": pk,
+                    "status": (
+                        statuses[changed[pk]] if pk in changed else "not_found"
+                    ),
+                }
+                for pk in recipe_ids
+            ]
+        )
+
+    @transaction.atomic
+    def toggle_recipe_link(
+        self, request, pk, model, counter, exists_error, missing_error,
+        on_change=(),
+    ):
+        """Добавляет рецепт в избранное или корзину либо удаляет его
+        одним SQL-запросом, ответ выбирается по числу затронутых строк.
+        Функции on_change вызываются в той же транзакции,
+        если связь изменилась."""
+        if not str(pk).isdigit():
+            raise Http404
         user = self.request.user
-        recipe = get_object_or_404(Recipes, pk=pk)
-        chosen = Favorite.objects.filter(user=user, recipe=recipe)
         if self.request.method == "POST":
-            if chosen.exists():
+            recipe = add_link(
+                model, "recipe", counter, user.id, pk, CART_RECIPE_FIELDS
+            )
+            if recipe is None:
+                raise Http404
+            if not recipe.created:
                 return Response(
-                    {"error": "Рецепт уже в избранном"},
+                    {"error": exists_error},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Favorite.objects.create(user=user, recipe=recipe)
-            serializer = CartSerializer(recipe, context={"request": request})
+            for callback in on_change:
+                callback(user.id, (recipe.id,), 1)
+            serializer = TimedSerializer(
+                CartSerializer(recipe, context={"request": request})
+            )
             return Response(serializer.data)
 
-        if self.request.method == "DELETE":
-            if chosen.exists():
-                chosen.delete()
-                return Response(status=status.HTTP_204_NO_CONTENT)
+        if remove_link(model, "recipe", counter, user.id, pk):
+            for callback in on_change:
+                callback(user.id, (int(pk),), -1)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipes, pk=pk)
         return Response(
-            {"error": "Рецепта нет в избранном"},
+            {"error": missing_error},
             status=status.HTTP_400_BAD_REQUEST
         )
 
@@ -256,44 +542,22 @@ class RecipesViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated, ]
     )
     def download_shopping_cart(self, request):
-        user = self.request.user
-        recipes = Recipes.objects.filter(shopping_cart__user=user)
-        if not recipes:
+        ingredients = list(
+            ShoppingListItem.objects.filter(user=self.request.user)
+            .values(
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                total_amount=F("amount"),
+            )
+            .order_by("ingredient__name", "ingredient__measurement_unit")
+        )
+        if not ingredients:
             return Response(status=status.HTTP_204_NO_CONTENT)
-        response = HttpResponse(content_type=TEXT_CSV)
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            shopping_cart_rows(writer, ingredients),
+            content_type=TEXT_CSV,
+        )
         response["Content-Disposition"] = "attachment; filename=" + \
             SHOPCART_FILENAME
-        ingredient_dict = {}
-        for recipe in recipes:
-            ingredient_data = AmountIngredient.objects.filter(recipe=recipe)
-            for data in ingredient_data:
-                ingredient = data.ingredient
-                ingredient_name = ingredient.name
-                ingredient_amount = data.amount
-                ingredient_measurement_unit = ingredient.measurement_unit
-                if ingredient_name in ingredient_dict:
-                    ingredient_dict[ingredient_name]["amount"] += \
-                        ingredient_amount
-                else:
-                    ingredient_dict[ingredient_name] = {
-                        "amount": ingredient_amount,
-                        "measurement_unit": ingredient_measurement_unit,
-                    }
-
-        writer = csv.writer(response)
-        writer.writerow(
-            (
-                "Ingredient name",
-                "Ingredient amount",
-                "Measurement unit",
-            )
-        )
-        for name, data in ingredient_dict.items():
-            writer.writerow(
-                (
-                    name,
-                    data["amount"],
-                    data["measurement_unit"],
-                )
-            )
         return response
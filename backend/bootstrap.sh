@@ -1,4 +1,10 @@
 #!/bin/bash
+export METRICS_DIR=${METRICS_DIR:-/tmp/foodgram-metrics}
+rm -rf "$METRICS_DIR" && mkdir -p "$METRICS_DIR"
 pipenv run ./manage.py collectstatic --noinput
 pipenv run ./manage.py migrate
-pipenv run gunicorn --bind 0.0.0.0:8000 foodgram.wsgi
\ No newline at end of file
+pipenv run ./manage.py createcachetable
+if [ -n "$INGREDIENTS_FILE" ]; then
+    pipenv run ./manage.py load_ingredients "$INGREDIENTS_FILE"
+fi
+pipenv run gunicorn --config gunicorn.conf.py
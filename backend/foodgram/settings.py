@@ -13,9 +13,43 @@ HEX_VALID = r"^#[0-9a-fA-F]{6}$"
 """Константа для проверки цвета тагов на соотвествие HEX."""
 MIN_INGREDIENT_AMOUNT = 1
 MAX_INGREDIENT_AMOUNT = 1000
+INGREDIENT_SEARCH_LIMIT = int(os.getenv("INGREDIENT_SEARCH_LIMIT", 50))
+"""Сколько ингредиентов возвращать при поиске по названию."""
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", 2))
+"""Количество потоков для создания уменьшенных копий картинок."""
+METRICS_DIR = os.getenv("METRICS_DIR")
+"""Каталог для обмена метриками между воркерами gunicorn."""
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+"""Bearer-токен Prometheus для /metrics; без него метрики видит только
+сотрудник, вошедший в админку."""
+RECIPES_BATCH_LIMIT = int(os.getenv("RECIPES_BATCH_LIMIT", 100))
+"""Сколько рецептов можно добавить в избранное или корзину одним запросом."""
+FEED_FANOUT_LIMIT = int(os.getenv("FEED_FANOUT_LIMIT", 1000))
+"""Сколько подписчиков может быть у автора, чтобы его рецепты
+рассылались в ленты; рецепты более популярных авторов читаются при запросе."""
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", 10000))
+"""До какой оценки планировщика админка считает строки точно."""
+TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", 14))
+"""За сколько последних дней учитывается активность в рейтинге trending."""
+TRENDING_HALF_LIFE_DAYS = float(os.getenv("TRENDING_HALF_LIFE_DAYS", 3))
+"""Через сколько дней вклад активности в рейтинг уменьшается вдвое."""
+TRENDING_TOP_SIZE = int(os.getenv("TRENDING_TOP_SIZE", 50))
+"""Сколько рецептов хранится в закешированном топе trending."""
+TRENDING_CACHE_SECONDS = int(os.getenv("TRENDING_CACHE_SECONDS", 300))
+"""Сколько секунд воркер отдает топ trending из кеша."""
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+"""Сколько токенов воркер держит в памяти после проверки."""
+TOKEN_CACHE_SECONDS = int(os.getenv("TOKEN_CACHE_SECONDS", 60))
+"""Сколько секунд токен считается проверенным без запроса к базе."""
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+INGREDIENTS_FILE = Path(
+    os.getenv("INGREDIENTS_FILE", BASE_DIR.parent / "data" / "ingredients.csv")
+)
+"""Файл со справочником ингредиентов для load_ingredients и seed_data."""
+
 SECRET_KEY = os.getenv("SECRET_KEY", "")
 
 
@@ -31,6 +65,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "users.apps.UsersConfig",
     "api.apps.ApiConfig",
     "recipes.apps.RecipesConfig",
@@ -42,6 +77,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,6 +120,59 @@ DATABASES = {
     }
 }
 
+REPLICA_DATABASES = []
+"""Алиасы реплик для чтения. DB_REPLICA_HOSTS - хосты через запятую,
+DB_REPLICA_MIRROR=true - реплика-заглушка на основную базу для отладки."""
+REPLICA_HOSTS = [
+    host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host
+]
+if os.getenv("DB_REPLICA_MIRROR", "false").lower() == "true":
+    REPLICA_HOSTS.append(DATABASES["default"]["HOST"])
+for number, host in enumerate(REPLICA_HOSTS):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["api.db_router.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+"""Сколько секунд после записи клиент читает из основной базы."""
+REPLICA_HEALTH_INTERVAL = int(os.getenv("DB_REPLICA_HEALTH_INTERVAL", 10))
+"""Как часто перепроверять доступность реплики, в секундах."""
+REPLICA_READ_VIEWS = (
+    "recipes-list",
+    "recipes-detail",
+    "tag-list",
+    "tag-detail",
+    "ingredients-list",
+    "ingredients-detail",
+    "users-list",
+    "users-detail",
+)
+"""Маршруты, которые можно читать из реплики."""
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "foodgram_cache"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 100000)),
+        },
+    }
+}
+"""Общий для всех воркеров кэш: версии справочников и токенов, топ trending.
+По умолчанию таблица в основной базе (manage.py createcachetable);
+CACHE_BACKEND и CACHE_LOCATION задают, например, Redis или Memcached.
+Кэш в памяти процесса (LocMemCache) здесь не годится."""
+CACHE_GENERATION_SECONDS = float(os.getenv("CACHE_GENERATION_SECONDS", 2))
+"""Как часто воркер перечитывает версии из CACHES; между проверками
+версия берется из памяти процесса, без запроса к кэшу."""
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -126,7 +216,16 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 6
@@ -0,0 +1,25 @@
+"""Настройки gunicorn.
+
+Режим выбирается переменной SERVER_MODE:
+- wsgi: синхронные воркеры (по умолчанию);
+- threads: воркеры gthread, пока один поток ждет PostgreSQL,
+  другие обслуживают запросы;
+- asgi: воркеры uvicorn для foodgram.asgi.
+"""
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+wsgi_app = "foodgram.wsgi:application"
+
+if SERVER_MODE == "threads":
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+elif SERVER_MODE == "asgi":
+    wsgi_app = "foodgram.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+elif SERVER_MODE != "wsgi":
+    raise RuntimeError(f"Неизвестный SERVER_MODE: {SERVER_MODE}")
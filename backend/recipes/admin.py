@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.core.files.storage import default_storage
 from django.utils.safestring import mark_safe
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
+from recipes.images import reset_image_variants, schedule_image_variants
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -10,6 +12,7 @@ from recipes.models import (
     Tag,
     AmountIngredient,
 )
+from recipes.paginator import EstimatedCountPaginator
 
 
 class IngredientsInline(admin.TabularInline):
@@ -48,6 +51,10 @@ class IngredientAdmin(ImportExportModelAdmin):
 
 class IngredientInlineAdmin(admin.TabularInline):
     model = AmountIngredient
+    autocomplete_fields = ("ingredient",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("recipe")
 
 
 class RecipesAdmin(admin.ModelAdmin):
@@ -61,20 +68,39 @@ class RecipesAdmin(admin.ModelAdmin):
         "name",
         "author",
         "cooking_time",
+        "favorites_count",
         "preview",
     )
     list_filter = (
         "tags",
     )
+    list_select_related = ("author",)
+    raw_id_fields = ("author",)
+    autocomplete_fields = ("ingredients",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     readonly_fields = ("preview",)
 
     def preview(self, obj):
+        url = obj.image.url
+        thumbnail = obj.image_variants.get("thumbnail", {}).get("jpeg")
+        if thumbnail:
+            url = default_storage.url(thumbnail)
         return mark_safe(
-            f'<img src="{obj.image.url}" style="max-height: 200px;">'
+            f'<img src="{url}" style="max-height: 200px;">'
         )
 
     preview.short_description = "Превью"
+
+    def save_model(self, request, obj, form, change):
+        """Как и API, пересоздает копии новой картинки."""
+        super().save_model(request, obj, form, change)
+        if not change:
+            schedule_image_variants(obj)
+        elif "image" in form.changed_data:
+            reset_image_variants(obj)
+            Recipes.objects.filter(pk=obj.pk).update(image_variants={})
     inlines = [
         IngredientInlineAdmin,
     ]
@@ -96,12 +122,16 @@ class FavoriteAdmin(admin.ModelAdmin):
         "recipe__name__icontains"
     )
     ordering = ("user",)
+    list_select_related = ("user", "recipe")
+    raw_id_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("recipe__tags")
 
     def get_recipe_count(self, obj):
-        return Favorite.objects.filter(
-            user=obj.user,
-            recipe=obj.recipe
-        ).count()
+        return obj.recipe.favorites_count
 
     def name(self, obj):
         return obj.recipe.name
@@ -128,6 +158,10 @@ class ShoppingCartAdmin(admin.ModelAdmin):
         "recipe__author__email__icontains",
     )
     ordering = ("user",)
+    list_select_related = ("user", "recipe")
+    raw_id_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class AmountIngredientAdmin(admin.ModelAdmin):
@@ -141,6 +175,11 @@ class AmountIngredientAdmin(admin.ModelAdmin):
         "recipe__author__email__icontains",
     )
     ordering = ("recipe",)
+    list_select_related = ("recipe", "ingredient")
+    raw_id_fields = ("recipe",)
+    autocomplete_fields = ("ingredient",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Ingredient, IngredientAdmin)
@@ -0,0 +1,107 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from foodgram.settings import IMAGE_VARIANT_WORKERS
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    "thumbnail": (200, 200),
+    "card": (480, 480),
+    "detail": (1200, 1200),
+}
+"""Размеры уменьшенных копий картинки рецепта."""
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+"""Форматы уменьшенных копий и параметры сохранения Pillow."""
+VARIANTS_PATH = "recipes/variants/{pk}/{version}/{variant}.{extension}"
+"""Путь копии. Версия меняется вместе с картинкой, поэтому копии новой
+картинки не отдаются из кэшей браузеров и CDN по старым адресам."""
+
+executor = ThreadPoolExecutor(
+    max_workers=IMAGE_VARIANT_WORKERS,
+    thread_name_prefix="recipe-images",
+)
+
+
+def variants_version(image_name):
+    return hashlib.sha1(image_name.encode()).hexdigest()[:12]
+
+
+def render_variant(image, size, image_format, options):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if image_format == "JPEG" and variant.mode != "RGB":
+        variant = variant.convert("RGB")
+    buffer = BytesIO()
+    variant.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def make_image_variants(pk):
+    """Создает уменьшенные копии картинки рецепта
+    и сохраняет их пути в поле image_variants."""
+    from recipes.models import Recipes
+
+    close_old_connections()
+    try:
+        recipe = Recipes.objects.only("image").get(pk=pk)
+        with recipe.image.open("rb") as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image.load()
+        version = variants_version(recipe.image.name)
+        variants = {}
+        for variant, size in IMAGE_VARIANTS.items():
+            variants[variant] = {}
+            for extension, (image_format, options) in IMAGE_FORMATS.items():
+                path = VARIANTS_PATH.format(
+                    pk=pk, version=version, variant=variant,
+                    extension=extension,
+                )
+                default_storage.delete(path)
+                variants[variant][extension] = default_storage.save(
+                    path,
+                    ContentFile(
+                        render_variant(image, size, image_format, options)
+                    ),
+                )
+        if not Recipes.objects.filter(pk=pk).update(
+            image_variants=variants
+        ):
+            delete_image_variants(variants)
+    except Exception:
+        logger.exception("Не удалось создать копии картинки рецепта %s", pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_variants(recipe):
+    """Ставит создание копий картинки в фоновый пул
+    после фиксации транзакции с загрузкой."""
+    pk = recipe.pk
+    transaction.on_commit(lambda: executor.submit(make_image_variants, pk))
+
+
+def reset_image_variants(recipe):
+    """Забывает копии замененной картинки: файлы удаляются после
+    фиксации, новые копии ставятся в очередь. Сохранить пустое
+    image_variants должен вызывающий код."""
+    variants = recipe.image_variants
+    recipe.image_variants = {}
+    transaction.on_commit(lambda: delete_image_variants(variants))
+    schedule_image_variants(recipe)
+
+
+def delete_image_variants(variants):
+    """Удаляет файлы уменьшенных копий из image_variants."""
+    for formats in variants.values():
+        for path in formats.values():
+            default_storage.delete(path)
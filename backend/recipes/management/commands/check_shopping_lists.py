@@ -0,0 +1,36 @@
+from api.shopping_list import diff_shopping_lists, rebuild_shopping_lists
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет списки покупок с корзинами и при --fix "
+        "пересчитывает их заново."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Пересчитать списки покупок, если есть расхождения.",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="Сколько расхождений вывести.",
+        )
+
+    def handle(self, *args, **options):
+        diff = diff_shopping_lists()
+        for user_id, ingredient_id, expected, saved in diff[:options["show"]]:
+            self.stdout.write(
+                f"user {user_id}, ingredient {ingredient_id}: "
+                f"ожидается {expected}, сохранено {saved}"
+            )
+        self.stdout.write(f"Расхождений: {len(diff)}")
+        if diff and options["fix"]:
+            rows = rebuild_shopping_lists()
+            self.stdout.write(
+                self.style.SUCCESS(f"Списки покупок пересчитаны: {rows}")
+            )
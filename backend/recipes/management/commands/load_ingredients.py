@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from api.catalog_cache import ingredients_cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from foodgram.settings import INGREDIENTS_FILE
+from recipes.models import Ingredient
+
+STAGING_TABLE = "ingredient_staging"
+
+
+def json_as_csv(file):
+    """Преобразует JSON-список ингредиентов в CSV для COPY."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in json.load(file):
+        writer.writerow((row["name"], row["measurement_unit"]))
+    buffer.seek(0)
+    return buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает ингредиенты из CSV или JSON через COPY во временную "
+        "таблицу и добавляет новые по ограничению unique_ingredient."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default=str(INGREDIENTS_FILE),
+            help="Файл ingredients.csv или ingredients.json.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Файл {path} не найден.")
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                "Загрузка через COPY работает только с PostgreSQL."
+            )
+        table = Ingredient._meta.db_table
+        start = time.perf_counter()
+        with open(path, encoding="utf-8") as file, transaction.atomic():
+            source = json_as_csv(file) if path.suffix == ".json" else file
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMP TABLE {STAGING_TABLE} "
+                    "(name text, measurement_unit text) ON COMMIT DROP"
+                )
+                cursor.copy_expert(
+                    f"COPY {STAGING_TABLE} (name, measurement_unit) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    source,
+                )
+                cursor.execute(f"SELECT count(*) FROM {STAGING_TABLE}")
+                total = cursor.fetchone()[0]
+                cursor.execute(
+                    f"INSERT INTO {table} (name, measurement_unit) "
+                    "SELECT DISTINCT trim(name), trim(measurement_unit) "
+                    f"FROM {STAGING_TABLE} AS staging WHERE NOT EXISTS ("
+                    f"SELECT 1 FROM {table} AS ingredient "
+                    "WHERE ingredient.name = trim(staging.name) "
+                    "AND ingredient.measurement_unit = "
+                    "trim(staging.measurement_unit)"
+                    ") ON CONFLICT (name, measurement_unit) DO NOTHING"
+                )
+                inserted = cursor.rowcount
+        if inserted:
+            ingredients_cache.bump()
+        self.stdout.write(self.style.SUCCESS(
+            f"Добавлено {inserted}, пропущено {total - inserted} "
+            f"за {time.perf_counter() - start:.2f} с."
+        ))
@@ -0,0 +1,9 @@
+from api.feed import rebuild_timelines
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Заново заполняет ленты подписок по текущим подпискам."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Записей в лентах: {rebuild_timelines()}")
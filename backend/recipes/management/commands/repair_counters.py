@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Favorite, Recipes, ShoppingCart
+from users.models import Subscribe, User
+
+
+def count_of(model, field):
+    """Подзапрос с количеством связанных объектов model."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+COUNTERS = (
+    (Recipes, "favorites_count", Favorite, "recipe"),
+    (Recipes, "in_carts_count", ShoppingCart, "recipe"),
+    (User, "recipes_count", Recipes, "author"),
+    (User, "subscribers_count", Subscribe, "author"),
+)
+"""Счетчик: (модель, поле, считаемая модель, поле связи)."""
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики рецептов, избранного, корзин и подписок."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько объектов проверять в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model, field, counted_model, relation in COUNTERS:
+            repaired = 0
+            last_pk = 0
+            while True:
+                batch = list(
+                    model.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1]
+                with transaction.atomic():
+                    drifted = (
+                        model.objects.filter(pk__in=batch)
+                        .select_for_update()
+                        .annotate(actual=count_of(counted_model, relation))
+                        .exclude(**{field: F("actual")})
+                        .only("pk", field)
+                    )
+                    objects = []
+                    for obj in drifted:
+                        setattr(obj, field, obj.actual)
+                        objects.append(obj)
+                    model.objects.bulk_update(objects, (field,))
+                repaired += len(objects)
+            self.stdout.write(
+                f"{model.__name__}.{field}: исправлено {repaired}"
+            )
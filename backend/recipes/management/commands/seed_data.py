@@ -0,0 +1,246 @@
+import csv
+import random
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Substr
+from foodgram.settings import INGREDIENTS_FILE
+from PIL import Image
+from recipes.models import (
+    RECIPES_SEARCH_VECTOR,
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipes,
+    ShoppingCart,
+    Tag,
+    recipes_tags_mask,
+)
+from users.models import Subscribe, User
+
+SEED_PREFIX = "seed"
+SEED_IMAGE = "recipes/seed.jpeg"
+SEED_TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+)
+BATCH_SIZE = 5000
+
+
+def power_law_weights(size, exponent):
+    """Веса 1 / rank^exponent: немногие объекты получают большую часть."""
+    return [1 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+def pick_distinct(rng, population, weights, count):
+    """До count разных объектов population с учетом весов."""
+    count = min(count, len(population))
+    chosen = set()
+    for _ in range(count * 3):
+        chosen.update(rng.choices(population, weights, k=count - len(chosen)))
+        if len(chosen) >= count:
+            break
+    return chosen
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими пользователями, рецептами, "
+        "избранным, корзинами и подписками для нагрузочных тестов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=5000)
+        parser.add_argument(
+            "--min-ingredients", type=int, default=3,
+            help="Минимум ингредиентов в рецепте.",
+        )
+        parser.add_argument(
+            "--max-ingredients", type=int, default=15,
+            help="Максимум ингредиентов в рецепте.",
+        )
+        parser.add_argument(
+            "--favorites", type=int, default=20,
+            help="Среднее количество избранных рецептов у пользователя.",
+        )
+        parser.add_argument(
+            "--cart", type=int, default=5,
+            help="Среднее количество рецептов в корзине у пользователя.",
+        )
+        parser.add_argument(
+            "--subscriptions", type=int, default=10,
+            help="Среднее количество подписок у пользователя.",
+        )
+        parser.add_argument(
+            "--exponent", type=float, default=1.1,
+            help="Показатель степенного распределения популярности.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--ingredients-file", default=str(INGREDIENTS_FILE),
+        )
+
+    def load_ingredients(self, path):
+        with open(path, encoding="utf-8") as file:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in csv.reader(file)
+                ),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+        return list(Ingredient.objects.values_list("pk", flat=True))
+
+    def load_tags(self):
+        for name, color, slug in SEED_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={"name": name, "color": color}
+            )
+        return list(Tag.objects.values_list("pk", flat=True))
+
+    def save_image(self):
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = BytesIO()
+            Image.new("RGB", (600, 400), "#E26C2D").save(buffer, "JPEG")
+            default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+    @staticmethod
+    def next_user_number():
+        """Номер после наибольшего из существующих seed-пользователей,
+        чтобы повторный запуск не совпал с ними по username и email."""
+        last = User.objects.filter(
+            username__regex=rf"^{SEED_PREFIX}[0-9]+$"
+        ).aggregate(
+            number=Max(
+                Cast(
+                    Substr("username", len(SEED_PREFIX) + 1),
+                    IntegerField(),
+                )
+            )
+        )["number"]
+        return 0 if last is None else last + 1
+
+    def create_users(self, count, first_number):
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f"{SEED_PREFIX}{number}",
+                    email=f"{SEED_PREFIX}{number}@example.org",
+                    first_name="Seed",
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(first_number, first_number + count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return [user.pk for user in users]
+
+    def create_recipes(self, rng, options, authors, tags, ingredients):
+        weights = power_law_weights(len(authors), options["exponent"])
+        recipe_authors = rng.choices(authors, weights, k=options["recipes"])
+        recipes = Recipes.objects.bulk_create(
+            (
+                Recipes(
+                    author_id=author,
+                    name=f"Рецепт {SEED_PREFIX} {number}",
+                    text=f"Синтетический рецепт номер {number}.",
+                    image=SEED_IMAGE,
+                    cooking_time=rng.randint(5, 180),
+                )
+                for number, author in enumerate(recipe_authors)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        recipe_ids = [recipe.pk for recipe in recipes]
+        Recipes.tags.through.objects.bulk_create(
+            (
+                Recipes.tags.through(recipes_id=recipe, tag_id=tag)
+                for recipe in recipe_ids
+                for tag in rng.sample(tags, rng.randint(1, len(tags)))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        AmountIngredient.objects.bulk_create(
+            (
+                AmountIngredient(
+                    recipe_id=recipe,
+                    ingredient_id=ingredient,
+                    amount=rng.randint(1, 500),
+                )
+                for recipe in recipe_ids
+                for ingredient in rng.sample(
+                    ingredients,
+                    min(
+                        rng.randint(
+                            options["min_ingredients"],
+                            options["max_ingredients"],
+                        ),
+                        len(ingredients),
+                    ),
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        Recipes.objects.filter(pk__in=recipe_ids).update(
+            search_vector=RECIPES_SEARCH_VECTOR,
+            tags_mask=recipes_tags_mask(),
+        )
+        return recipe_ids
+
+    def create_links(self, rng, model, field, users, targets, mean, exponent):
+        """Связи пользователей с объектами: число связей у пользователя
+        и популярность объектов распределены по степенному закону."""
+        weights = power_law_weights(len(targets), exponent)
+        shuffled = targets[:]
+        rng.shuffle(shuffled)
+        objects = []
+        for user in users:
+            count = min(int(rng.paretovariate(2) * mean / 2), len(targets))
+            for target in pick_distinct(rng, shuffled, weights, count):
+                if target != user or model is not Subscribe:
+                    objects.append(model(user_id=user, **{field: target}))
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        return len(objects)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        ingredients = self.load_ingredients(options["ingredients_file"])
+        tags = self.load_tags()
+        self.save_image()
+        users = self.create_users(options["users"], self.next_user_number())
+        recipes = self.create_recipes(rng, options, users, tags, ingredients)
+        exponent = options["exponent"]
+        favorites = self.create_links(
+            rng, Favorite, "recipe_id", users, recipes,
+            options["favorites"], exponent,
+        )
+        carts = self.create_links(
+            rng, ShoppingCart, "recipe_id", users, recipes,
+            options["cart"], exponent,
+        )
+        subscriptions = self.create_links(
+            rng, Subscribe, "author_id", users, users,
+            options["subscriptions"], exponent,
+        )
+        call_command("repair_counters", stdout=self.stdout)
+        call_command("rebuild_timelines", stdout=self.stdout)
+        call_command(
+            "check_shopping_lists", fix=True, show=0, stdout=self.stdout
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано: пользователей {len(users)}, рецептов {len(recipes)}, "
+            f"избранного {favorites}, корзин {carts}, "
+            f"подписок {subscriptions}."
+        ))
@@ -0,0 +1,16 @@
+from api.trending import cache_trending_top, update_trending_scores
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинг trending по дневной активности "
+        "и обновляет закешированный топ. Запускается периодически."
+    )
+
+    def handle(self, *args, **options):
+        updated = update_trending_scores()
+        top = cache_trending_top()
+        self.stdout.write(
+            f"Рейтинг изменился у {updated} рецептов, в топе {len(top)}."
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 08:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def stagger_pub_dates(apps, schema_editor):
+    """Разводит даты существующих рецептов по id: у всех них одно
+    значение timezone.now, а курсор и сортировка опираются на pub_date."""
+    Recipes = apps.get_model("recipes", "Recipes")
+    table = schema_editor.quote_name(Recipes._meta.db_table)
+    schema_editor.execute(
+        f"UPDATE {table} SET pub_date = pub_date "
+        f"- (SELECT MAX(id) FROM {table}) * INTERVAL '1 second' "
+        f"+ id * INTERVAL '1 second'"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_auto_20230709_1911'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipes',
+            options={'ordering': ('-pub_date', '-id'), 'verbose_name': 'Рецепт', 'verbose_name_plural': 'Рецепты'},
+        ),
+        migrations.AddField(
+            model_name='recipes',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата публикации'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(stagger_pub_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipes',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipes_pub_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 08:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timelines(apps, schema_editor):
+    """Заполняет ленты по уже существующим подпискам."""
+    Subscribe = apps.get_model('users', 'Subscribe')
+    Recipes = apps.get_model('recipes', 'Recipes')
+    Timeline = apps.get_model('recipes', 'Timeline')
+    schema_editor.execute(
+        f'INSERT INTO {Timeline._meta.db_table} (user_id, recipe_id) '
+        f'SELECT subscribe.user_id, recipes.id '
+        f'FROM {Subscribe._meta.db_table} subscribe '
+        f'JOIN {Recipes._meta.db_table} recipes '
+        f'ON recipes.author_id = subscribe.author_id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0011_unique_links'),
+        ('users', '0004_user_feed_fanout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='in_timeline', to='recipes.recipes', verbose_name='Рецепт в ленте')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Владелец ленты')),
+            ],
+            options={
+                'verbose_name': 'Лента подписок',
+                'verbose_name_plural': 'Ленты подписок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timeline',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
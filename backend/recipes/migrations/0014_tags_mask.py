@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+def assign_tag_bits(apps, schema_editor):
+    """Раздает существующим тегам биты по порядку id."""
+    Tag = apps.get_model('recipes', 'Tag')
+    for bit, tag in enumerate(Tag.objects.order_by('pk')):
+        tag.bit = bit
+        tag.save(update_fields=('bit',))
+
+
+def fill_tags_masks(apps, schema_editor):
+    """Считает маски тегов для существующих рецептов."""
+    Recipes = apps.get_model('recipes', 'Recipes')
+    Tag = apps.get_model('recipes', 'Tag')
+    through = Recipes.tags.through._meta.db_table
+    schema_editor.execute(
+        f'UPDATE {Recipes._meta.db_table} recipes SET tags_mask = masks.mask '
+        f'FROM (SELECT links.recipes_id, '
+        f'BIT_OR(CAST(1 AS bigint) << tag.bit) AS mask '
+        f'FROM {through} links '
+        f'JOIN {Tag._meta.db_table} tag ON tag.id = links.tag_id '
+        f'GROUP BY links.recipes_id) masks '
+        f'WHERE masks.recipes_id = recipes.id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_shopping_list'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, unique=True, verbose_name='Бит в маске тегов рецепта'),
+        ),
+        migrations.RunPython(assign_tag_bits, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, unique=True, verbose_name='Бит в маске тегов рецепта'),
+        ),
+        migrations.AddField(
+            model_name='recipes',
+            name='tags_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.RunPython(fill_tags_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,157 @@
+from django.db import migrations
+
+CREATE_TRIGGERS = """
+CREATE FUNCTION recipes_apply_shopping_list(
+    users bigint[], ingredients bigint[], amounts bigint[]
+) RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    emptied bigint[];
+BEGIN
+    WITH changed AS (
+        INSERT INTO recipes_shoppinglistitem (user_id, ingredient_id, amount)
+        SELECT * FROM unnest(users, ingredients, amounts)
+            AS deltas (user_id, ingredient_id, amount)
+        WHERE deltas.amount <> 0
+        ON CONFLICT (user_id, ingredient_id) DO UPDATE
+        SET amount = recipes_shoppinglistitem.amount + EXCLUDED.amount
+        RETURNING id, amount
+    )
+    SELECT array_agg(id) INTO emptied FROM changed WHERE amount <= 0;
+    DELETE FROM recipes_shoppinglistitem WHERE id = ANY(emptied);
+END;
+$$;
+
+CREATE FUNCTION recipes_shopping_list_cart() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    users bigint[];
+    ingredients bigint[];
+    amounts bigint[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(user_id), array_agg(ingredient_id), array_agg(amount)
+        INTO users, ingredients, amounts
+        FROM (
+            SELECT cart.user_id, amounts.ingredient_id,
+                SUM(amounts.amount) AS amount
+            FROM new_rows cart
+            JOIN recipes_amountingredient amounts
+                ON amounts.recipe_id = cart.recipe_id
+            GROUP BY cart.user_id, amounts.ingredient_id
+        ) deltas;
+    ELSE
+        SELECT array_agg(user_id), array_agg(ingredient_id), array_agg(amount)
+        INTO users, ingredients, amounts
+        FROM (
+            SELECT cart.user_id, amounts.ingredient_id,
+                -SUM(amounts.amount) AS amount
+            FROM old_rows cart
+            JOIN recipes_amountingredient amounts
+                ON amounts.recipe_id = cart.recipe_id
+            GROUP BY cart.user_id, amounts.ingredient_id
+        ) deltas;
+    END IF;
+    PERFORM recipes_apply_shopping_list(users, ingredients, amounts);
+    RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION recipes_shopping_list_amounts() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    users bigint[];
+    ingredients bigint[];
+    amounts bigint[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(user_id), array_agg(ingredient_id), array_agg(amount)
+        INTO users, ingredients, amounts
+        FROM (
+            SELECT cart.user_id, changed.ingredient_id,
+                SUM(changed.amount) AS amount
+            FROM new_rows changed
+            JOIN recipes_shoppingcart cart
+                ON cart.recipe_id = changed.recipe_id
+            GROUP BY cart.user_id, changed.ingredient_id
+        ) deltas;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(user_id), array_agg(ingredient_id), array_agg(amount)
+        INTO users, ingredients, amounts
+        FROM (
+            SELECT cart.user_id, changed.ingredient_id,
+                -SUM(changed.amount) AS amount
+            FROM old_rows changed
+            JOIN recipes_shoppingcart cart
+                ON cart.recipe_id = changed.recipe_id
+            GROUP BY cart.user_id, changed.ingredient_id
+        ) deltas;
+    ELSE
+        SELECT array_agg(user_id), array_agg(ingredient_id), array_agg(amount)
+        INTO users, ingredients, amounts
+        FROM (
+            SELECT cart.user_id, changed.ingredient_id,
+                SUM(changed.amount) AS amount
+            FROM (
+                SELECT recipe_id, ingredient_id, amount FROM new_rows
+                UNION ALL
+                SELECT recipe_id, ingredient_id, -amount FROM old_rows
+            ) changed
+            JOIN recipes_shoppingcart cart
+                ON cart.recipe_id = changed.recipe_id
+            GROUP BY cart.user_id, changed.ingredient_id
+        ) deltas;
+    END IF;
+    PERFORM recipes_apply_shopping_list(users, ingredients, amounts);
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER recipes_shopping_list_cart_insert
+AFTER INSERT ON recipes_shoppingcart
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_shopping_list_cart();
+
+CREATE TRIGGER recipes_shopping_list_cart_delete
+AFTER DELETE ON recipes_shoppingcart
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_shopping_list_cart();
+
+CREATE TRIGGER recipes_shopping_list_amounts_insert
+AFTER INSERT ON recipes_amountingredient
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_shopping_list_amounts();
+
+CREATE TRIGGER recipes_shopping_list_amounts_update
+AFTER UPDATE ON recipes_amountingredient
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_shopping_list_amounts();
+
+CREATE TRIGGER recipes_shopping_list_amounts_delete
+AFTER DELETE ON recipes_amountingredient
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_shopping_list_amounts();
+"""
+"""Списки покупок следуют за корзинами и ингредиентами рецептов
+при любых изменениях: через API, админку и каскадные удаления."""
+
+DROP_TRIGGERS = """
+DROP TRIGGER recipes_shopping_list_amounts_delete ON recipes_amountingredient;
+DROP TRIGGER recipes_shopping_list_amounts_update ON recipes_amountingredient;
+DROP TRIGGER recipes_shopping_list_amounts_insert ON recipes_amountingredient;
+DROP TRIGGER recipes_shopping_list_cart_delete ON recipes_shoppingcart;
+DROP TRIGGER recipes_shopping_list_cart_insert ON recipes_shoppingcart;
+DROP FUNCTION recipes_shopping_list_amounts();
+DROP FUNCTION recipes_shopping_list_cart();
+DROP FUNCTION recipes_apply_shopping_list(bigint[], bigint[], bigint[]);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_trending'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -1,6 +1,10 @@
+from django.contrib.postgres.aggregates import BitOr
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from users.models import User
+from django.db.models.functions import Cast, Coalesce
+from users.models import DenormalizedFieldsMixin, User
 from foodgram.settings import (
     MIN_COOKING_TIME,
     MAX_COOKING_TIME,
@@ -11,6 +15,14 @@ from recipes.validators import validate_hex_color
 
 
 COOKING_ERROR = f"Время в минутах от {MIN_COOKING_TIME} до {MAX_COOKING_TIME}."
+SEARCH_CONFIG = "russian"
+RECIPES_SEARCH_VECTOR = (
+    SearchVector("name", weight="A", config=SEARCH_CONFIG)
+    + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+)
+"""Поисковый вектор рецепта: название весомее описания."""
+TAG_MASK_BITS = 63
+"""Сколько тегов помещается в маску рецепта (bigint без знакового бита)."""
 
 
 class Tag(models.Model):
@@ -25,6 +37,11 @@ class Tag(models.Model):
     )
     slug = models.SlugField(verbose_name="Уникальный слаг",
                             max_length=100, unique=True)
+    bit = models.PositiveSmallIntegerField(
+        verbose_name="Бит в маске тегов рецепта",
+        unique=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Тег"
@@ -39,6 +56,21 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Tag.objects.values_list("bit", flat=True))
+            free = [bit for bit in range(TAG_MASK_BITS) if bit not in used]
+            if not free:
+                raise ValueError(
+                    f"Можно создать не больше {TAG_MASK_BITS} тегов"
+                )
+            self.bit = free[0]
+        super().save(*args, **kwargs)
+
 
 class Ingredient(models.Model):
     """Информациия о ингредиентах."""
@@ -66,7 +98,7 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipes(models.Model):
+class Recipes(DenormalizedFieldsMixin, models.Model):
     """Информациия о рецептах."""
 
     tags = models.ManyToManyField(
@@ -90,6 +122,12 @@ class Recipes(models.Model):
         max_length=200
     )
     image = models.ImageField(verbose_name="Картинка")
+    image_variants = models.JSONField(
+        verbose_name="Уменьшенные копии картинки",
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(verbose_name="Описание рецепта")
     cooking_time = models.IntegerField(
         verbose_name="Время приготовления",
@@ -100,15 +138,107 @@ class Recipes(models.Model):
         ),
         error_messages={"invalid": COOKING_ERROR},
     )
+    pub_date = models.DateTimeField(
+        verbose_name="Дата публикации",
+        auto_now_add=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name="Количество добавлений в избранное",
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name="Количество добавлений в корзину",
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name="Поисковый вектор",
+        null=True,
+        editable=False,
+    )
+    tags_mask = models.BigIntegerField(
+        verbose_name="Маска тегов",
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        verbose_name="Рейтинг популярности за последние дни",
+        default=0,
+        editable=False,
+    )
+
+    DENORMALIZED_FIELDS = (
+        "image_variants",
+        "favorites_count",
+        "in_carts_count",
+        "search_vector",
+        "tags_mask",
+        "trending_score",
+    )
 
     class Meta:
+        ordering = ("-pub_date", "-id")
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = (
+            models.Index(
+                fields=("-pub_date", "-id"),
+                name="recipes_pub_date_id_idx",
+            ),
+            GinIndex(
+                fields=("search_vector",),
+                name="recipes_search_vector_idx",
+            ),
+            GinIndex(
+                fields=("name",),
+                name="recipes_name_trgm_idx",
+                opclasses=("gin_trgm_ops",),
+            ),
+            models.Index(
+                fields=("-favorites_count", "-in_carts_count", "-id"),
+                name="recipes_popular_idx",
+            ),
+            models.Index(
+                fields=("-trending_score", "-id"),
+                name="recipes_trending_idx",
+            ),
+        )
 
     def __str__(self):
         return self.name
 
 
+def recipes_tags_mask():
+    """Выражение для пересчета маски тегов рецепта: OR битов его тегов."""
+    return Coalesce(
+        models.Subquery(
+            Recipes.tags.through.objects.filter(recipes=models.OuterRef("pk"))
+            .order_by()
+            .values("recipes")
+            .annotate(
+                mask=BitOr(
+                    models.ExpressionWrapper(
+                        Cast(1, models.BigIntegerField()).bitleftshift(
+                            models.F("tag__bit")
+                        ),
+                        output_field=models.BigIntegerField(),
+                    )
+                )
+            )
+            .values("mask")
+        ),
+        0,
+    )
+
+
+def filter_by_tags_mask(queryset, mask):
+    """Рецепты, у которых есть хотя бы один тег из маски."""
+    return queryset.alias(
+        tags_match=models.F("tags_mask").bitand(mask)
+    ).filter(tags_match__gt=0)
+
+
 class Favorite(models.Model):
     """Информациия об избранном."""
 
@@ -128,6 +258,12 @@ class Favorite(models.Model):
     class Meta:
         verbose_name = "Избранное"
         verbose_name_plural = "Избранное"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "recipe"),
+                name="unique_favorite",
+            ),
+        )
 
     def __str__(self):
         return f"{self.recipe} в избранном у {self.user.username}"
@@ -152,11 +288,75 @@ class ShoppingCart(models.Model):
     class Meta:
         verbose_name = "Корзина покупок"
         verbose_name_plural = "Корзина покупок"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "recipe"),
+                name="unique_shopping_cart",
+            ),
+        )
 
     def __str__(self):
         return f"{self.recipe} в корзине у {self.user.username}"
 
 
+class RecipeActivity(models.Model):
+    """Изменение числа добавлений рецепта в избранное и корзину за день."""
+
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.CASCADE,
+        related_name="activity",
+        verbose_name="Рецепт",
+    )
+    day = models.DateField("День")
+    favorites = models.IntegerField("Добавления в избранное", default=0)
+    carts = models.IntegerField("Добавления в корзину", default=0)
+
+    class Meta:
+        verbose_name = "Активность по рецепту"
+        verbose_name_plural = "Активность по рецептам"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("recipe", "day"),
+                name="unique_recipe_activity",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.recipe} за {self.day}"
+
+
+class Timeline(models.Model):
+    """Лента подписок: рецепты авторов, на которых подписан пользователь.
+    Заполняется при публикации рецепта и при подписке."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Владелец ленты",
+    )
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.CASCADE,
+        related_name="in_timeline",
+        verbose_name="Рецепт в ленте",
+    )
+
+    class Meta:
+        verbose_name = "Лента подписок"
+        verbose_name_plural = "Ленты подписок"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "recipe"),
+                name="unique_timeline",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.recipe} в ленте у {self.user.username}"
+
+
 class AmountIngredient(models.Model):
     """Информациия о количества ингридиеннтов для рецептов."""
 
@@ -191,3 +391,36 @@ class AmountIngredient(models.Model):
 
     def __str__(self):
         return self.recipe.name
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя.
+    Обновляется триггерами в базе при любых изменениях корзины
+    и ингредиентов рецептов."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Владелец списка покупок",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="in_shopping_list",
+        verbose_name="Ингредиент",
+    )
+    amount = models.IntegerField("Количество")
+
+    class Meta:
+        verbose_name = "Список покупок"
+        verbose_name_plural = "Списки покупок"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="unique_shopping_list_item",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.ingredient} {self.amount} у {self.user.username}"
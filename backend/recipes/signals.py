@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipes.images import delete_image_variants
+from recipes.models import (
+    RECIPES_SEARCH_VECTOR,
+    Recipes,
+    Tag,
+    filter_by_tags_mask,
+    recipes_tags_mask,
+)
+
+
+@receiver(post_save, sender=Recipes)
+def update_search_vector(sender, instance, **kwargs):
+    """Пересчитывает поисковый вектор после сохранения рецепта."""
+    Recipes.objects.filter(pk=instance.pk).update(
+        search_vector=RECIPES_SEARCH_VECTOR
+    )
+
+
+@receiver(m2m_changed, sender=Recipes.tags.through)
+def update_tags_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает маску тегов рецептов, у которых изменились теги."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        recipes = Recipes.objects.filter(pk=instance.pk)
+    elif pk_set is not None:
+        recipes = Recipes.objects.filter(pk__in=pk_set)
+    else:
+        recipes = filter_by_tags_mask(Recipes.objects.all(), instance.mask)
+    recipes.update(tags_mask=recipes_tags_mask())
+
+
+@receiver(post_delete, sender=Tag)
+def remove_tag_from_masks(sender, instance, **kwargs):
+    """Убирает бит удаленного тега из масок рецептов."""
+    filter_by_tags_mask(Recipes.objects.all(), instance.mask).update(
+        tags_mask=recipes_tags_mask()
+    )
+
+
+@receiver(post_delete, sender=Recipes)
+def remove_image_variants(sender, instance, **kwargs):
+    """Удаляет копии картинки удаленного рецепта после фиксации."""
+    variants = instance.image_variants
+    transaction.on_commit(lambda: delete_image_variants(variants))
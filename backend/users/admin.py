@@ -1,4 +1,5 @@
 from django.contrib import admin
+from recipes.paginator import EstimatedCountPaginator
 from users.models import Subscribe, User
 
 
@@ -14,6 +15,10 @@ class SubscribeAdmin(admin.ModelAdmin):
         "user",
         "author",
     )
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -31,6 +36,8 @@ class UserAdmin(admin.ModelAdmin):
         "last_name",
     )
     empty_value_display = "-пусто-"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
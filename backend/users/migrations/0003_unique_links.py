@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 08:25
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+APP_LABEL = 'users'
+
+
+def remove_duplicates(model_name, target, counter):
+    """Удаляет повторные связи, оставляя первую, и поправляет счетчик.
+    Счетчик к этому моменту уже заполнен миграцией recipes 0010."""
+    def forwards(apps, schema_editor):
+        Link = apps.get_model(APP_LABEL, model_name)
+        Target = Link._meta.get_field(target).related_model
+        duplicates = (
+            Link.objects.order_by()
+            .values('user', target)
+            .annotate(first=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for row in duplicates:
+            Link.objects.filter(
+                user=row['user'], **{target: row[target]}
+            ).exclude(id=row['first']).delete()
+            Target.objects.filter(pk=row[target]).update(
+                **{counter: F(counter) - (row['total'] - 1)}
+            )
+    return forwards
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_counters'),
+        ('recipes', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicates('subscribe', 'author', 'subscribers_count'),
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='subscribe',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_subscribe'),
+        ),
+    ]
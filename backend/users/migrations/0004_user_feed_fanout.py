@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_unique_links'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_fanout',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Рассылать рецепты в ленты подписчиков'),
+        ),
+    ]
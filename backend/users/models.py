@@ -3,7 +3,31 @@ from django.db import models
 from users.validators import validate_username
 
 
-class User(AbstractUser):
+class DenormalizedFieldsMixin:
+    """Полное сохранение существующей строки не перезаписывает
+    DENORMALIZED_FIELDS: их меняют через F() и update() в обход
+    загруженного объекта, и в нем могут быть устаревшие значения."""
+
+    DENORMALIZED_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DENORMALIZED_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(DenormalizedFieldsMixin, AbstractUser):
     """Информация о пользователях."""
 
     USER = "user"
@@ -26,6 +50,14 @@ class User(AbstractUser):
     password = models.TextField("Пароль", max_length=150)
     role = models.CharField("Роль", max_length=250,
                             choices=ROLES, default=USER)
+    recipes_count = models.PositiveIntegerField(
+        "Количество рецептов", default=0, editable=False)
+    subscribers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0, editable=False)
+    feed_fanout = models.BooleanField(
+        "Рассылать рецепты в ленты подписчиков", default=True, editable=False)
+
+    DENORMALIZED_FIELDS = ("recipes_count", "subscribers_count", "feed_fanout")
 
     class Meta:
         ordering = ("username",)
@@ -59,6 +91,12 @@ class Subscribe(models.Model):
     class Meta:
         verbose_name = "Подписки"
         verbose_name_plural = "Подписки"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "author"),
+                name="unique_subscribe",
+            ),
+        )
 
     def __str__(self):
         return f"{self.user.username} подписан на {self.author.username}"